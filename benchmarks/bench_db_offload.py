@@ -0,0 +1,84 @@
+"""
+Throughput of a route that calls Supabase inline vs. through `database.execute`.
+
+Each simulated query sleeps for --latency seconds inside `.execute()`, which is
+what the synchronous supabase client does while it waits for PostgREST. The
+benchmark fires --requests requests with --concurrency in flight at once
+through an in-process ASGI transport and reports requests/sec for both routes.
+
+Usage:
+    python -m benchmarks.bench_db_offload --requests 400 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import time
+
+# database.py builds the client at import time; no request is ever sent here
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.benchmark")
+
+import httpx
+from fastapi import FastAPI
+from database import execute, SUPABASE_MAX_CONCURRENCY
+
+
+class SlowQuery:
+    """Stand-in for a postgrest request builder with a blocking execute()."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def execute(self):
+        time.sleep(self.latency)
+        return {"data": []}
+
+
+def build_app(latency: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/inline")
+    async def inline():
+        return SlowQuery(latency).execute()
+
+    @app.get("/offloaded")
+    async def offloaded():
+        return await execute(SlowQuery(latency))
+
+    return app
+
+
+async def run(path: str, app: FastAPI, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return requests / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated PostgREST round trip (s)")
+    args = parser.parse_args()
+
+    app = build_app(args.latency)
+    print(
+        f"{args.requests} requests, {args.concurrency} concurrent, "
+        f"{args.latency * 1000:.0f} ms per query, SUPABASE_MAX_CONCURRENCY={SUPABASE_MAX_CONCURRENCY}"
+    )
+    for path in ("/inline", "/offloaded"):
+        rps = await run(path, app, args.requests, args.concurrency)
+        print(f"{path:<12} {rps:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,362 @@
+"""
+FAQ matcher microbenchmarks at 1k / 10k / 100k FAQs.
+
+Builds reproducible synthetic corpora (English, plus Devanagari Hindi and
+Gujarati shares) and labelled query sets from --seed, then for every matcher
+and corpus size measures:
+
+- index build time and memory held by the built index (tracemalloc)
+- match latency p50 / p95 / p99 per query kind and per query length
+- match quality: precision and recall against the labelled pairs
+
+Query kinds: exact questions, paraphrases (reordered words, different
+phrasing, one word dropped), misspellings (one or two character edits),
+long queries (extra context around the question), romanized Hindi /
+Gujarati typed for a native-script FAQ, and negatives that match no FAQ.
+
+Matchers are factories taking the FAQ rows and returning an object with
+`match(query_text, language) -> (faq_id, answer, score) | None`. The current
+index is built in, both per-process and served from a memory-mapped snapshot
+(whose mapped pages are shared across workers, so they do not count towards
+its memory); a replacement can be passed as --matcher module:factory.
+
+Usage:
+    python -m benchmarks.bench_faq_matcher --json benchmarks/results/faq_matcher.json
+    python -m benchmarks.bench_faq_matcher --sizes 1000 10000 --baseline benchmarks/results/faq_matcher.json
+"""
+import argparse
+import asyncio
+import gc
+import importlib
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# services.faq_index imports database.py; no request is ever sent here
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.benchmark")
+
+import numpy as np
+from services.faq_index import FAQIndex
+from services.language import GUJARATI_OFFSET, transliterate
+
+EN_TEMPLATES = (
+    "How do I {} ?", "When is the {} ?", "Where can I find the {} ?", "What is the process for {} ?",
+    "Who approves the {} ?", "Can I get {} ?", "Is there any {} this semester?",
+)
+EN_PARAPHRASES = (
+    "please tell me about {}", "{} details", "need help with {}", "i want to know {}", "{} kindly explain",
+)
+EN_CONTEXT = "i am a second year student from the hostel and my friend also asked, {} thanks in advance"
+HI_TEMPLATES = ("{} कब है ?", "{} कैसे करें ?", "{} कहाँ मिलेगा ?", "{} क्या है ?")
+CONSONANTS = "कखगघचछजझटठडढतथदधनपफबभमयरलवशसह"
+VOWEL_SIGNS = ("", "ा", "ि", "ी", "ु", "ू", "े", "ै", "ो")
+EN_ONSETS = "b c d f g h j k l m n p r s t v y".split() + ["ch", "sh", "th", "pr", "st", "gr"]
+EN_VOWELS = "a e i o u ai ea oo".split()
+
+
+# ------------------------------
+# Synthetic data
+# ------------------------------
+def latin_word(rng: random.Random) -> str:
+    return "".join(rng.choice(EN_ONSETS) + rng.choice(EN_VOWELS) for _ in range(rng.randint(2, 4)))
+
+
+def devanagari_word(rng: random.Random) -> str:
+    return "".join(rng.choice(CONSONANTS) + rng.choice(VOWEL_SIGNS) for _ in range(rng.randint(2, 4)))
+
+
+def to_gujarati(text: str) -> str:
+    return "".join(chr(ord(c) + GUJARATI_OFFSET) if 0x0900 <= ord(c) <= 0x097F else c for c in text)
+
+
+def vocabulary(rng: random.Random, size: int, make) -> list[str]:
+    words = set()
+    while len(words) < size:
+        words.add(make(rng))
+    return sorted(words)
+
+
+def zipf_pick(rng: random.Random, words: list[str], count: int) -> list[str]:
+    """`count` distinct words, common ones far more likely (rank^-1.1)."""
+    picked = []
+    while len(picked) < count:
+        rank = min(int(rng.paretovariate(1.1)), len(words)) - 1
+        word = words[rank if rng.random() < 0.5 else rng.randrange(len(words))]
+        if word not in picked:
+            picked.append(word)
+    return picked
+
+
+def misspell(rng: random.Random, word: str) -> str:
+    if len(word) < 5:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    edit = rng.choice(("swap", "drop", "double", "replace"))
+    if edit == "swap":
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if edit == "drop":
+        return word[:i] + word[i + 1:]
+    if edit == "double":
+        return word[:i] + word[i] + word[i:]
+    return word[:i] + rng.choice("aeiou") + word[i + 1:]
+
+
+def build_corpus(size: int, seed: int, hindi_share: float, gujarati_share: float):
+    """Returns (FAQ rows, {faq id: (language, content words)})."""
+    rng = random.Random(seed)
+    en_words = vocabulary(rng, max(2000, size // 4), latin_word)
+    hi_words = vocabulary(rng, max(500, size // 20), devanagari_word)
+
+    rows, content, seen = [], {}, set()
+    for faq_id in range(1, size + 1):
+        roll = rng.random()
+        language = "hi" if roll < hindi_share else "gu" if roll < hindi_share + gujarati_share else "en"
+        words = hi_words if language != "en" else en_words
+        while True:
+            picked = zipf_pick(rng, words, rng.randint(3, 5))
+            key = (language, frozenset(picked))
+            if key not in seen:
+                seen.add(key)
+                break
+        if language == "en":
+            question = rng.choice(EN_TEMPLATES).format(" ".join(picked))
+        else:
+            question = rng.choice(HI_TEMPLATES).format(" ".join(picked))
+            if language == "gu":
+                question = to_gujarati(question)
+        rows.append({"id": faq_id, "question": question, "answer": f"Answer {faq_id}"})
+        content[faq_id] = (language, picked)
+    return rows, content
+
+
+def build_queries(rows: list[dict], content: dict, count: int, seed: int) -> list[dict]:
+    """Labelled queries: {"kind", "text", "language", "expected" (faq id or None)}."""
+    rng = random.Random(seed + 1)
+    by_language: dict[str, list[int]] = {}
+    for faq_id, (language, _) in content.items():
+        by_language.setdefault(language, []).append(faq_id)
+    questions = {row["id"]: row["question"] for row in rows}
+    known = {word for _, words in content.values() for word in words}
+
+    kinds = ("exact", "paraphrase", "misspelled", "long", "romanized", "negative")
+    queries = []
+    for n in range(count):
+        kind = kinds[n % len(kinds)]
+        if kind == "romanized":
+            pool = by_language.get("hi", []) + by_language.get("gu", [])
+            if not pool:
+                continue
+            faq_id = rng.choice(pool)
+            language = content[faq_id][0]
+            queries.append({"kind": kind, "language": language, "expected": faq_id,
+                            "text": transliterate(questions[faq_id])})
+            continue
+        if kind == "negative":
+            words = []
+            while len(words) < 3:
+                word = latin_word(rng)
+                if word not in known:
+                    words.append(word)
+            queries.append({"kind": kind, "language": "en", "expected": None,
+                            "text": rng.choice(EN_TEMPLATES).format(" ".join(words))})
+            continue
+
+        faq_id = rng.choice(by_language["en"])
+        words = list(content[faq_id][1])
+        if kind == "exact":
+            text = questions[faq_id]
+        elif kind == "paraphrase":
+            rng.shuffle(words)
+            if len(words) > 3:
+                words.pop()
+            text = rng.choice(EN_PARAPHRASES).format(" ".join(words))
+        elif kind == "misspelled":
+            for i in rng.sample(range(len(words)), k=min(2, len(words))):
+                words[i] = misspell(rng, words[i])
+            text = rng.choice(EN_TEMPLATES).format(" ".join(words))
+        else:
+            text = EN_CONTEXT.format(questions[faq_id])
+        queries.append({"kind": kind, "language": "en", "expected": faq_id, "text": text})
+    return queries
+
+
+# ------------------------------
+# Matchers
+# ------------------------------
+def faq_index_matcher(rows: list[dict]):
+    """The production matcher: sharded BM25 `FAQIndex`."""
+    index = FAQIndex(snapshot_path=None)
+    asyncio.run(index.load(rows))
+    return index
+
+
+def faq_snapshot_matcher(rows: list[dict]):
+    """`FAQIndex` mapping a shared snapshot file (FAQ_SNAPSHOT_PATH)."""
+    path = os.path.join(tempfile.mkdtemp(prefix="faq-snapshot-"), "faqs.snap")
+    index = FAQIndex(snapshot_path=path)
+    asyncio.run(index.load(rows))
+    # The mapping outlives the file
+    os.remove(path)
+    os.remove(f"{path}.lock")
+    os.rmdir(os.path.dirname(path))
+    return index
+
+
+MATCHERS = {"faq_index": faq_index_matcher, "faq_snapshot": faq_snapshot_matcher}
+
+
+def load_factory(spec: str):
+    if spec in MATCHERS:
+        return MATCHERS[spec]
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+# ------------------------------
+# Measurements
+# ------------------------------
+def percentiles_us(samples: list[float]) -> dict:
+    if not samples:
+        return {}
+    p50, p95, p99 = np.percentile(np.array(samples) * 1e6, [50, 95, 99])
+    return {"count": len(samples), "p50_us": round(float(p50), 1), "p95_us": round(float(p95), 1), "p99_us": round(float(p99), 1)}
+
+
+def quality(results: list[tuple[dict, int | None]]) -> dict:
+    returned = [(query, got) for query, got in results if got is not None]
+    correct = sum(1 for query, got in returned if got == query["expected"])
+    positives = sum(1 for query, _ in results if query["expected"] is not None)
+    return {
+        "precision": round(correct / len(returned), 4) if returned else None,
+        "recall": round(correct / positives, 4) if positives else None,
+        "matched": len(returned),
+        "correct": correct,
+    }
+
+
+def length_bucket(text: str) -> str:
+    words = len(text.split())
+    return "1-5 words" if words <= 5 else "6-10 words" if words <= 10 else "11+ words"
+
+
+def bench(factory, rows: list[dict], queries: list[dict], repeat: int) -> dict:
+    gc.collect()
+    started = time.perf_counter()
+    matcher = factory(rows)
+    build_seconds = time.perf_counter() - started
+    del matcher
+
+    # Separate build under tracemalloc: it slows allocation-heavy code down
+    gc.collect()
+    tracemalloc.start()
+    matcher = factory(rows)
+    gc.collect()
+    index_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    for query in queries[:200]:  # warm up caches / lazy init
+        matcher.match(query["text"], query["language"])
+
+    by_kind: dict[str, list[float]] = {}
+    by_length: dict[str, list[float]] = {}
+    outcomes = []
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            hit = matcher.match(query["text"], query["language"])
+            elapsed = time.perf_counter() - started
+            by_kind.setdefault(query["kind"], []).append(elapsed)
+            by_length.setdefault(length_bucket(query["text"]), []).append(elapsed)
+            if len(outcomes) < len(queries):
+                outcomes.append((query, hit[0] if hit else None))
+
+    every = [sample for samples in by_kind.values() for sample in samples]
+    return {
+        "build_seconds": round(build_seconds, 4),
+        "index_mib": round(index_bytes / 2 ** 20, 2),
+        "build_peak_mib": round(peak_bytes / 2 ** 20, 2),
+        "latency": percentiles_us(every),
+        "latency_by_kind": {kind: percentiles_us(samples) for kind, samples in by_kind.items()},
+        "latency_by_length": {bucket: percentiles_us(samples) for bucket, samples in sorted(by_length.items())},
+        "quality": quality(outcomes),
+        "quality_by_kind": {
+            kind: quality([(query, got) for query, got in outcomes if query["kind"] == kind])
+            for kind in by_kind
+        },
+    }
+
+
+def ratio(value) -> str:
+    return "     -" if value is None else f"{value:>6.3f}"
+
+
+def report(name: str, size: int, result: dict, baseline: dict | None):
+    latency, q = result["latency"], result["quality"]
+    line = (
+        f"{name:<12} {size:>7} {result['build_seconds']:>8.3f} {result['index_mib']:>8.1f} "
+        f"{latency['p50_us']:>8.1f} {latency['p95_us']:>8.1f} {latency['p99_us']:>8.1f} "
+        f"{ratio(q['precision'])} {ratio(q['recall'])}"
+    )
+    if baseline:
+        line += (
+            f"   p95 {(latency['p95_us'] / baseline['latency']['p95_us'] - 1) * 100:+.0f}%"
+            f" recall {(q['recall'] or 0) - (baseline['quality']['recall'] or 0):+.3f}"
+        )
+    print(line)
+    for kind, kq in result["quality_by_kind"].items():
+        kl = result["latency_by_kind"][kind]
+        print(f"  {kind:<11} p50 {kl['p50_us']:>7.1f} us  p95 {kl['p95_us']:>7.1f} us  "
+              f"precision {ratio(kq['precision'])}  recall {ratio(kq['recall'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=1200, help="labelled queries per corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes over the query set")
+    parser.add_argument("--hindi-share", type=float, default=0.1)
+    parser.add_argument("--gujarati-share", type=float, default=0.05)
+    parser.add_argument("--matcher", action="append", help="name or module:factory (default: all built in)")
+    parser.add_argument("--seed", type=int, default=20240917)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against a previous --json file")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    matchers = {spec: load_factory(spec) for spec in (args.matcher or MATCHERS)}
+    results = {}
+    print(f"{'matcher':<12} {'faqs':>7} {'build s':>8} {'MiB':>8} {'p50 us':>8} {'p95 us':>8} {'p99 us':>8} {'prec':>6} {'recall':>6}")
+    for size in args.sizes:
+        rows, content = build_corpus(size, args.seed, args.hindi_share, args.gujarati_share)
+        queries = build_queries(rows, content, args.queries, args.seed)
+        for name, factory in matchers.items():
+            result = bench(factory, rows, queries, args.repeat)
+            results.setdefault(name, {})[str(size)] = result
+            before = ((baseline or {}).get("results", {}).get(name) or {}).get(str(size))
+            report(name, size, result, before)
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or ".", exist_ok=True)
+        with open(args.json, "w") as f:
+            json.dump({
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "args": {key: value for key, value in vars(args).items() if key not in ("json", "baseline")},
+                "results": results,
+            }, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
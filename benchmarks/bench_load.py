@@ -0,0 +1,290 @@
+"""
+End-to-end load benchmark against the in-memory database backend.
+
+Runs the real application (lifespan included) on `DATABASE_BACKEND=memory`,
+seeded with --students / --faqs / --news rows, and drives a weighted mix of
+student and admin routes through an in-process ASGI transport with
+--concurrency requests in flight. Every simulated database round trip sleeps
+--latency seconds (plus up to --jitter), like a PostgREST call would.
+
+Reports requests/sec and p50 / p95 / p99 latency per route. --json writes the
+results to a file, and --baseline compares against such a file, so a change
+can be measured offline and tracked over time.
+
+Usage:
+    python -m benchmarks.bench_load --requests 2000 --concurrency 50 --latency 0.02
+    python -m benchmarks.bench_load --json after.json --baseline before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+# Must be set before anything imports database.py
+os.environ["DATABASE_BACKEND"] = "memory"
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.benchmark")
+
+import httpx
+import numpy as np
+import main
+from database import supabase
+from services.auth import create_jwt_token
+from services.credentials import passwords
+from services.warmup import warmup
+
+PASSWORD = "benchmark-password"
+DEPARTMENTS = ("CSE", "IT", "ECE", "ME", "CE")
+TOPICS = (
+    "hostel fees", "exam timetable", "library hours", "scholarship form", "bus pass",
+    "canteen menu", "sports quota", "placement cell", "lab manual", "id card",
+)
+ACTIONS = ("When is the deadline for", "How do I apply for", "Where can I find", "Who handles", "What is the")
+
+
+# ------------------------------
+# Seed data
+# ------------------------------
+async def seed(args, rng: random.Random) -> dict:
+    now = datetime.now(timezone.utc)
+
+    def stamp(minutes: int) -> str:
+        return (now - timedelta(minutes=minutes)).isoformat()
+
+    # One scrypt hash shared by every student: seeding stays fast, logins still pay the KDF
+    hashed = await passwords.hash_password(PASSWORD)
+    students = [
+        {
+            "id": i,
+            "name": f"Student {i}",
+            "email": f"student{i}@example.edu",
+            "password": hashed,
+            "department": DEPARTMENTS[i % len(DEPARTMENTS)],
+            "enrollment_no": f"EN{i:06d}",
+            "role": "student",
+            "status": "active",
+            "created_at": stamp(args.students - i),
+        }
+        for i in range(1, args.students + 1)
+    ]
+    faqs = [
+        {
+            "id": i,
+            "question": f"{ACTIONS[i % len(ACTIONS)]} {TOPICS[i % len(TOPICS)]} {i}?",
+            "answer": f"Answer {i}: see the {TOPICS[i % len(TOPICS)]} notice on the portal.",
+            "source_type": "text",
+            "source_file": None,
+            "created_by": 1,
+            "created_at": stamp(args.faqs - i),
+            "updated_at": None,
+            "status": "solved",
+        }
+        for i in range(1, args.faqs + 1)
+    ]
+    news = [
+        {
+            "id": i,
+            "title": f"Notice {i}",
+            "content": f"Update on {TOPICS[i % len(TOPICS)]}. " * 8,
+            "created_by": 1,
+            "created_at": stamp(args.news - i),
+            "updated_at": None,
+        }
+        for i in range(1, args.news + 1)
+    ]
+    chat_logs = [
+        {
+            "id": i,
+            "student_id": rng.randint(1, args.students),
+            "query_text": faqs[i % len(faqs)]["question"],
+            "bot_response": faqs[i % len(faqs)]["answer"],
+            "faq_id": faqs[i % len(faqs)]["id"],
+            "status": "solved",
+            "created_at": stamp(args.students * 10 - i),
+        }
+        for i in range(1, args.students * 10 + 1)
+    ]
+    admins = [{"id": 1, "name": "Admin", "email": "admin@example.edu", "password": hashed, "role": "admin", "status": "active"}]
+    supabase.seed({
+        "students": students,
+        "faqs": faqs,
+        "news": news,
+        "chat_logs": chat_logs,
+        "unsolved_queries": [],
+        "admins": admins,
+    })
+    return {"faqs": faqs}
+
+
+# ------------------------------
+# Scenarios
+# ------------------------------
+def student_headers(student_id: int) -> dict:
+    token = create_jwt_token(
+        {"student_id": student_id, "email": f"student{student_id}@example.edu", "role": "student"},
+        expires_in=timedelta(hours=1),
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+def build_scenarios(args, data: dict) -> dict:
+    admin = {"Authorization": "Bearer " + create_jwt_token(
+        {"admin_id": 1, "email": "admin@example.edu", "role": "admin"}, expires_in=timedelta(hours=1),
+    )}
+    sessions = {i: student_headers(i) for i in range(1, min(args.students, 200) + 1)}
+
+    def chat(client, rng):
+        student_id = rng.choice(list(sessions))
+        if rng.random() < args.hit_rate:
+            query = rng.choice(data["faqs"])["question"]
+        else:
+            query = f"{rng.choice(ACTIONS)} {rng.choice(TOPICS)} next semester {rng.randint(1, 10**6)}?"
+        return client.post("/student/chat", headers=sessions[student_id], json={
+            "student_id": student_id, "query_text": query, "detected_language": "en",
+        })
+
+    def home(client, rng):
+        student_id = rng.choice(list(sessions))
+        return client.get(f"/student/home/{student_id}", headers=sessions[student_id])
+
+    def news(client, rng):
+        return client.get("/student/news", headers=sessions[rng.choice(list(sessions))])
+
+    def history(client, rng):
+        student_id = rng.choice(list(sessions))
+        return client.get(f"/student/chat/{student_id}", headers=sessions[student_id])
+
+    def login(client, rng):
+        return client.post("/student/login", json={
+            "email": f"student{rng.randint(1, args.students)}@example.edu", "password": PASSWORD,
+        })
+
+    return {
+        "POST /student/chat": (40, chat),
+        "GET /student/home/{id}": (15, home),
+        "GET /student/news": (15, news),
+        "GET /student/chat/{id}": (8, history),
+        "POST /student/login": (2, login),
+        "GET /admin/faqs": (5, lambda client, rng: client.get("/admin/faqs", headers=admin)),
+        "GET /admin/news": (5, lambda client, rng: client.get("/admin/news", headers=admin)),
+        "GET /admin/students": (5, lambda client, rng: client.get("/admin/students", headers=admin)),
+        "GET /admin/dashboard": (5, lambda client, rng: client.get("/admin/dashboard", headers=admin)),
+    }
+
+
+# ------------------------------
+# Driver
+# ------------------------------
+async def drive(client, scenarios: dict, requests: int, concurrency: int, rng: random.Random) -> tuple[dict, float]:
+    names = list(scenarios)
+    weights = [scenarios[name][0] for name in names]
+    plan = rng.choices(names, weights=weights, k=requests)
+    samples = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    queue = iter(plan)
+
+    async def worker():
+        for name in queue:
+            started = time.perf_counter()
+            response = await scenarios[name][1](client, rng)
+            samples[name].append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors[name] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for name in names:
+        latencies = np.array(samples[name]) * 1000
+        if not len(latencies):
+            continue
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        results[name] = {
+            "requests": len(latencies),
+            "errors": errors[name],
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+        }
+    return results, elapsed
+
+
+def report(results: dict, elapsed: float, total: int, baseline: dict | None):
+    print(f"{'route':<26} {'reqs':>6} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, row in results.items():
+        line = (
+            f"{name:<26} {row['requests']:>6} {row['errors']:>5} {row['rps']:>8.1f} "
+            f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}"
+        )
+        before = (baseline or {}).get("routes", {}).get(name)
+        if before and before["p95_ms"]:
+            line += f"   p95 {(row['p95_ms'] / before['p95_ms'] - 1) * 100:+.0f}%"
+        print(line)
+    print(f"{'total':<26} {total:>6} {'':>5} {total / elapsed:>8.1f}")
+    if baseline:
+        print(f"baseline total: {baseline['total_rps']:.1f} req/s")
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    supabase.latency = args.latency
+    supabase.jitter = args.jitter
+    data = await seed(args, rng)
+    scenarios = build_scenarios(args, data)
+
+    async with main.lifespan(main.app):
+        while not warmup.ready:
+            await asyncio.sleep(0.01)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            if args.warmup:
+                await drive(client, scenarios, args.warmup, args.concurrency, rng)
+            results, elapsed = await drive(client, scenarios, args.requests, args.concurrency, rng)
+
+    print(
+        f"{args.requests} requests, {args.concurrency} concurrent, {args.latency * 1000:.0f} ms "
+        f"(+{args.jitter * 1000:.0f} ms jitter) per query, {args.students} students, "
+        f"{args.faqs} FAQs, {args.news} news, {supabase.calls} database calls"
+    )
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report(results, elapsed, args.requests, baseline)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "args": vars(args),
+                "elapsed_seconds": round(elapsed, 3),
+                "total_rps": round(args.requests / elapsed, 1),
+                "routes": results,
+            }, f, indent=2)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=200, help="requests run before measuring")
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated PostgREST round trip (s)")
+    parser.add_argument("--jitter", type=float, default=0.005, help="extra random latency, up to (s)")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--faqs", type=int, default=500)
+    parser.add_argument("--news", type=int, default=200)
+    parser.add_argument("--hit-rate", type=float, default=0.7, help="share of chat queries that match a FAQ")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against a previous --json file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(parse_args()))
@@ -1,7 +1,69 @@
+import time
 from os import getenv
+from anyio import CapacityLimiter, to_thread
 from supabase import create_client, Client
+from services.metrics import describe_query, supabase_call_duration, supabase_call_errors, supabase_pool_wait
 
-url = getenv("SUPABASE_URL")
-key = getenv("SUPABASE_KEY")
+# "memory" swaps Supabase for the in-process stand-in in services/memory_db.py
+# (local runs and benchmarks; data lives only as long as the process)
+DATABASE_BACKEND = getenv("DATABASE_BACKEND", "supabase")
 
-supabase: Client = create_client(url, key)
+_client = None
+
+
+def connect():
+    """Builds the database client once: from the app lifespan, or on first use."""
+    global _client
+    if _client is None:
+        if getenv("DATABASE_BACKEND", DATABASE_BACKEND) == "memory":
+            from services.memory_db import MemoryClient
+            _client = MemoryClient()
+        else:
+            _client = create_client(getenv("SUPABASE_URL"), getenv("SUPABASE_KEY"))
+    return _client
+
+
+class LazyClient:
+    """
+    Module-level stand-in for the client, so importing this module has no
+    side effects: attribute access is forwarded to the client built by
+    `connect()`.
+    """
+
+    def __getattr__(self, name):
+        return getattr(connect(), name)
+
+    def __setattr__(self, name, value):
+        setattr(connect(), name, value)
+
+
+supabase = LazyClient()
+
+# The supabase client is synchronous, so every `.execute()` is a blocking HTTP
+# round trip. Route handlers hand it to a worker thread instead; the limiter
+# caps how many run at once (and so how many pooled connections are in use).
+SUPABASE_MAX_CONCURRENCY = int(getenv("SUPABASE_MAX_CONCURRENCY", "16"))
+limiter = CapacityLimiter(SUPABASE_MAX_CONCURRENCY)
+
+
+async def execute(query):
+    """Run `query.execute()` on a worker thread without blocking the event loop."""
+    table, operation = describe_query(query)
+    queued = time.perf_counter()
+    started = None
+
+    def run():
+        nonlocal started
+        started = time.perf_counter()
+        return query.execute()
+
+    try:
+        return await to_thread.run_sync(run, limiter=limiter)
+    except Exception:
+        supabase_call_errors.inc(table, operation)
+        raise
+    finally:
+        finished = time.perf_counter()
+        if started is not None:
+            supabase_pool_wait.observe(started - queued, table, operation)
+            supabase_call_duration.observe(finished - started, table, operation)
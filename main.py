@@ -1,10 +1,78 @@
 from dotenv import load_dotenv
 load_dotenv()   # 👈 Load environment FIRST
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from os import getenv
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from database import connect
+from services import pdf_import
+from services.clustering import unsolved_clusters
+from services.compression import CompressionMiddleware
+from services.credentials import passwords
+from services import metrics
+from services.student_import import import_passwords
+from services.faq_index import faq_index
+from services.news_cache import news_snapshot
+from services.unsolved import unsolved_version
+from services.warmup import warmup
+from services.write_behind import chat_log_writer
 from src import router as app_router
+from src.admin.dashboard import dashboard_stats
 
-app = FastAPI(title="Admin APIs with Supabase")
+logging.basicConfig(level=getenv("LOG_LEVEL", "INFO"), format="%(levelname)s:     %(name)s - %(message)s")
+# httpx (under the Supabase client) logs every request at INFO
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+FAQ_INDEX_REFRESH_SECONDS = int(getenv("FAQ_INDEX_REFRESH_SECONDS", "300"))
+
+
+async def refresh_faq_index():
+    """Periodically reload the FAQ index and query clusters to pick up edits made by other workers."""
+    while True:
+        await asyncio.sleep(FAQ_INDEX_REFRESH_SECONDS)
+        try:
+            await faq_index.load()
+            await unsolved_clusters.load()
+        except Exception:
+            logger.exception("Periodic refresh failed")
+
+
+# ✅ Startup / shutdown hooks
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    connect()
+    # Caches load concurrently in the background; /ready turns 200 once all are warm
+    warmup.add("faq_index", faq_index.load)
+    warmup.add("news", news_snapshot.get)
+    warmup.add("dashboard", dashboard_stats.get)
+    warmup.add("unsolved_clusters", unsolved_clusters.load)
+    warmup.start()
+    # With FAQ_SNAPSHOT_PATH set, swap to FAQ snapshots built by other workers
+    faq_index.start_watcher()
+    # New unsolved queries join their cluster as soon as they are stored,
+    # and invalidate the ETags of GET /admin/unsolved
+    chat_log_writer.on_flushed("unsolved_queries", unsolved_clusters.add_many)
+    chat_log_writer.on_flushed("unsolved_queries", unsolved_version.bump)
+    await chat_log_writer.start()
+    refresher = asyncio.create_task(refresh_faq_index())
+    yield
+    refresher.cancel()
+    with suppress(asyncio.CancelledError):
+        await refresher
+    await warmup.stop()
+    await faq_index.stop_watcher()
+    # Flush queued chat logs before the worker exits
+    await chat_log_writer.stop()
+    pdf_import.shutdown()
+    passwords.shutdown()
+    import_passwords.shutdown()
+
+
+app = FastAPI(title="Admin APIs with Supabase", lifespan=lifespan)
 
 # ✅ Enable CORS (important for frontend connection)
 app.add_middleware(
@@ -15,10 +83,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ✅ gzip / brotli for large JSON lists (small responses are left alone)
+app.add_middleware(CompressionMiddleware)
+
+# ✅ Latency / in-flight metrics (outermost, so compression time is included)
+app.add_middleware(metrics.MetricsMiddleware)
+
 # ✅ Include all your route modules
 app.include_router(router = app_router)
 
-# ✅ Root test endpoint
+# ✅ Root test endpoint (liveness)
 @app.get("/")
 def root():
     return {"message": "FastAPI + Supabase backend running with CORS enabled!"}
+
+
+# ✅ Readiness: 503 until the startup warm-up has finished
+@app.get("/ready")
+async def ready():
+    status = warmup.status()
+    return status if warmup.ready else JSONResponse(status_code=503, content=status)
+
+
+# ✅ Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,82 @@
+-- Resolves a batch of unsolved student queries in one transaction.
+--
+-- items: [{"id": 12, "reviewed": true, "solved": true, "answer": "..."}, ...]
+--
+-- Per solved item: adds the answer as an FAQ, answers every unsolved chat log
+-- of that student with the same (trimmed) question, or inserts one if there
+-- is none, and deletes the unsolved query. Unsolved-but-reviewed items are
+-- only flagged. Returns one result object per item, in order:
+--   {"id", "status": "solved" | "reviewed" | "not_found", ...}
+--
+-- Called by POST /admin/unsolved/resolve and PUT /admin/unsolved/{id} via
+-- supabase.rpc("resolve_unsolved_queries", {...}).
+
+create or replace function public.resolve_unsolved_queries(items jsonb, p_admin_id bigint default null)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_item jsonb;
+  v_query public.unsolved_queries%rowtype;
+  v_faq public.faqs%rowtype;
+  v_answer text;
+  v_chat_ids bigint[];
+  v_results jsonb := '[]'::jsonb;
+begin
+  for v_item in select value from jsonb_array_elements(items) loop
+    select * into v_query
+    from public.unsolved_queries
+    where id = (v_item->>'id')::bigint
+    for update;
+
+    if not found then
+      v_results := v_results || jsonb_build_object('id', (v_item->>'id')::bigint, 'status', 'not_found');
+      continue;
+    end if;
+
+    if not coalesce((v_item->>'solved')::boolean, false) then
+      update public.unsolved_queries
+      set reviewed = coalesce((v_item->>'reviewed')::boolean, true)
+      where id = v_query.id;
+      v_results := v_results || jsonb_build_object('id', v_query.id, 'status', 'reviewed');
+      continue;
+    end if;
+
+    v_answer := coalesce(nullif(v_item->>'answer', ''), 'Answer added by admin');
+
+    insert into public.faqs (question, answer, source_type, created_by, created_at, updated_at, status)
+    values (v_query.query_text, v_answer, 'text', coalesce(p_admin_id, 1), now(), now(), 'solved')
+    returning * into v_faq;
+
+    with answered as (
+      update public.chat_logs
+      set bot_response = v_answer, status = 'solved', faq_id = v_faq.id, updated_at = now()
+      where student_id = v_query.student_id
+        and status = 'unsolved'
+        and btrim(query_text) = btrim(v_query.query_text)
+      returning id
+    )
+    select array_agg(id) into v_chat_ids from answered;
+
+    if v_chat_ids is null then
+      insert into public.chat_logs (student_id, query_text, bot_response, faq_id, status, created_at)
+      values (v_query.student_id, btrim(v_query.query_text), v_answer, v_faq.id, 'solved', now())
+      returning array[id] into v_chat_ids;
+    end if;
+
+    delete from public.unsolved_queries where id = v_query.id;
+
+    v_results := v_results || jsonb_build_object(
+      'id', v_query.id,
+      'status', 'solved',
+      'student_id', v_query.student_id,
+      'query_text', v_query.query_text,
+      'answer', v_answer,
+      'faq', to_jsonb(v_faq),
+      'chat_log_ids', to_jsonb(v_chat_ids)
+    );
+  end loop;
+
+  return v_results;
+end;
+$$;
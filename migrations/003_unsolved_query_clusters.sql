@@ -0,0 +1,127 @@
+-- Near-duplicate clusters of unsolved queries, stored on the rows.
+--
+-- Every unsolved query carries its token fingerprint and the id of its
+-- cluster, so every worker (and every admin request) sees the same
+-- clusters. The API proposes a cluster for near-duplicates (MinHash, see
+-- services/clustering.py); otherwise the insert trigger joins the open
+-- cluster with the same fingerprint, or starts a new one named after the
+-- row's own id.
+--
+-- unsolved_query_clusters: GET /admin/unsolved/clusters, largest first.
+-- resolve_unsolved_cluster: POST /admin/unsolved/clusters/{id}/resolve.
+--   Locks the cluster, adds one FAQ and answers every member with it via
+--   resolve_unsolved_queries, all in one transaction.
+
+alter table public.unsolved_queries
+  add column if not exists fingerprint text,
+  add column if not exists cluster_id bigint;
+
+update public.unsolved_queries set cluster_id = id where cluster_id is null;
+
+create index if not exists unsolved_queries_open_cluster_idx
+  on public.unsolved_queries (cluster_id) where not reviewed;
+create index if not exists unsolved_queries_open_fingerprint_idx
+  on public.unsolved_queries (fingerprint) where not reviewed;
+
+create or replace function public.unsolved_queries_assign_cluster()
+returns trigger
+language plpgsql
+as $$
+begin
+  if new.cluster_id is null and new.fingerprint is not null then
+    select cluster_id into new.cluster_id
+    from public.unsolved_queries
+    where fingerprint = new.fingerprint and not reviewed
+    order by id
+    limit 1;
+  end if;
+  new.cluster_id := coalesce(new.cluster_id, new.id);
+  return new;
+end;
+$$;
+
+drop trigger if exists unsolved_queries_assign_cluster on public.unsolved_queries;
+create trigger unsolved_queries_assign_cluster
+  before insert on public.unsolved_queries
+  for each row execute function public.unsolved_queries_assign_cluster();
+
+create or replace function public.unsolved_query_clusters(p_limit int default 50, p_min_count int default 1)
+returns jsonb
+language sql
+stable
+as $$
+  select coalesce(jsonb_agg(to_jsonb(c) order by c.count desc, c.id), '[]'::jsonb)
+  from (
+    select
+      cluster_id as id,
+      (array_agg(btrim(query_text) order by id))[1] as representative,
+      count(*) as count,
+      count(distinct student_id) as students,
+      (array_agg(id order by id))[1:50] as query_ids,
+      min(created_at) as first_seen,
+      max(created_at) as last_seen
+    from public.unsolved_queries
+    where not reviewed
+    group by cluster_id
+    having count(*) >= p_min_count
+    order by count(*) desc, cluster_id
+    limit p_limit
+  ) c;
+$$;
+
+create or replace function public.resolve_unsolved_cluster(
+  p_cluster_id bigint,
+  p_answer text,
+  p_question text default null,
+  p_admin_id bigint default null
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_ids bigint[];
+  v_question text;
+  v_faq_id bigint;
+  v_results jsonb;
+begin
+  -- Lock the members so none is resolved or deleted half way through
+  select array_agg(id order by id) into v_ids
+  from (
+    select id from public.unsolved_queries
+    where cluster_id = p_cluster_id and not reviewed
+    order by id
+    for update
+  ) members;
+
+  if v_ids is null then
+    return '[]'::jsonb;
+  end if;
+
+  select coalesce(nullif(p_question, ''), btrim(query_text)) into v_question
+  from public.unsolved_queries where id = v_ids[1];
+
+  -- The first member creates the FAQ...
+  v_results := public.resolve_unsolved_queries(
+    jsonb_build_array(jsonb_build_object(
+      'id', v_ids[1], 'reviewed', true, 'solved', true, 'answer', p_answer, 'question', v_question
+    )),
+    p_admin_id
+  );
+  v_faq_id := (v_results->0->'faq'->>'id')::bigint;
+
+  -- ...and the rest link to it
+  if array_length(v_ids, 1) > 1 then
+    v_results := v_results || public.resolve_unsolved_queries(
+      (
+        select jsonb_agg(jsonb_build_object(
+          'id', member_id, 'reviewed', true, 'solved', true, 'answer', p_answer, 'faq_id', v_faq_id
+        ) order by member_id)
+        from unnest(v_ids[2:]) as member_id
+      ),
+      p_admin_id
+    );
+  end if;
+
+  return v_results;
+end;
+$$;
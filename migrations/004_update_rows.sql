@@ -0,0 +1,49 @@
+-- Applies a different patch to each row of a table in one UPDATE statement.
+--
+-- p_table:   "faqs" or "news"
+-- p_patches: [{"id": 12, "question": "..."}, {"id": 13, "status": "..."}, ...]
+--
+-- Only the columns present in a row's patch change; `updated_at` is set on
+-- every updated row. Ids that do not exist are skipped (never inserted).
+-- Returns the updated rows.
+--
+-- Called by services/batch.py update_many via supabase.rpc("update_rows", {...}).
+
+create or replace function public.update_rows(p_table text, p_patches jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_set text;
+  v_rows jsonb;
+begin
+  if p_table not in ('faqs', 'news') then
+    raise exception 'update_rows: table % is not allowed', p_table using errcode = '22023';
+  end if;
+
+  select string_agg(format('%1$I = case when p.value ? %2$L then r.%1$I else t.%1$I end', key, key), ', ')
+  into v_set
+  from (
+    select distinct jsonb_object_keys(patch) as key
+    from jsonb_array_elements(p_patches) as patch
+  ) keys
+  where key not in ('id', 'updated_at');
+
+  execute format(
+    'with updated as (
+       update public.%1$I t
+       set %2$s updated_at = now()
+       from jsonb_array_elements($1) p, jsonb_populate_record(null::public.%1$I, p.value) r
+       where t.id = r.id
+       returning t.*
+     )
+     select coalesce(jsonb_agg(to_jsonb(updated)), ''[]''::jsonb) from updated',
+    p_table,
+    coalesce(v_set || ',', '')
+  )
+  using p_patches
+  into v_rows;
+
+  return v_rows;
+end;
+$$;
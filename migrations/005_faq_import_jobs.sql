@@ -0,0 +1,20 @@
+-- Status of background PDF → FAQ imports (services/pdf_import.py).
+--
+-- Written by the worker running the import, read by
+-- GET /admin/faqs/imports/{id} on any worker.
+
+create table if not exists public.faq_import_jobs (
+  id text primary key,
+  filename text not null,
+  created_by bigint,
+  status text not null default 'queued',  -- queued | extracting | inserting | completed | failed
+  total_pages integer,
+  pages_done integer not null default 0,
+  faqs_found integer not null default 0,
+  faqs_inserted integer not null default 0,
+  error text,
+  created_at timestamptz not null default now(),
+  finished_at timestamptz
+);
+
+create index if not exists faq_import_jobs_created_at_idx on public.faq_import_jobs (created_at desc);
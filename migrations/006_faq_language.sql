@@ -0,0 +1,8 @@
+-- Language of an FAQ, for the per-language FAQ match shards
+-- (services/faq_index.py).
+--
+-- NULL (the default) shards the FAQ by the script of its question. Set it
+-- where the script does not tell, e.g. 'hi' for a Hindi FAQ typed in Latin
+-- script, so it is matched against Hindi queries.
+
+alter table public.faqs add column if not exists language text;
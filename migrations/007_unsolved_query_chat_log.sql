@@ -0,0 +1,106 @@
+-- Links each unsolved query to the chat log it was asked in.
+--
+-- resolve_unsolved_queries used to find the chat log to answer by the
+-- student and the exact query text, so two open queries with the same text
+-- from one student answered each other's logs, and a log differing only in
+-- inner whitespace was missed. Queries queued by the chat endpoints now
+-- carry `chat_log_id` (set by the write-behind writer once the log is
+-- stored) and v3 of the function answers exactly that log. Rows from before
+-- this migration have no link and keep the text match, restricted to logs
+-- no other query is linked to.
+
+alter table public.unsolved_queries
+  add column if not exists chat_log_id bigint references public.chat_logs (id) on delete set null;
+
+create index if not exists unsolved_queries_chat_log_idx
+  on public.unsolved_queries (chat_log_id);
+
+create or replace function public.resolve_unsolved_queries(items jsonb, p_admin_id bigint default null)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_item jsonb;
+  v_query public.unsolved_queries%rowtype;
+  v_faq public.faqs%rowtype;
+  v_answer text;
+  v_chat_ids bigint[];
+  v_results jsonb := '[]'::jsonb;
+begin
+  for v_item in select value from jsonb_array_elements(items) loop
+    select * into v_query
+    from public.unsolved_queries
+    where id = (v_item->>'id')::bigint
+    for update;
+
+    if not found then
+      v_results := v_results || jsonb_build_object('id', (v_item->>'id')::bigint, 'status', 'not_found');
+      continue;
+    end if;
+
+    if not coalesce((v_item->>'solved')::boolean, false) then
+      update public.unsolved_queries
+      set reviewed = coalesce((v_item->>'reviewed')::boolean, true)
+      where id = v_query.id;
+      v_results := v_results || jsonb_build_object('id', v_query.id, 'status', 'reviewed');
+      continue;
+    end if;
+
+    if v_item->>'faq_id' is not null then
+      select * into v_faq from public.faqs where id = (v_item->>'faq_id')::bigint;
+      if not found then
+        v_results := v_results || jsonb_build_object('id', v_query.id, 'status', 'not_found');
+        continue;
+      end if;
+      v_answer := coalesce(nullif(v_item->>'answer', ''), v_faq.answer);
+    else
+      v_answer := coalesce(nullif(v_item->>'answer', ''), 'Answer added by admin');
+
+      insert into public.faqs (question, answer, source_type, created_by, created_at, updated_at, status)
+      values (
+        coalesce(nullif(v_item->>'question', ''), v_query.query_text),
+        v_answer, 'text', coalesce(p_admin_id, 1), now(), now(), 'solved'
+      )
+      returning * into v_faq;
+    end if;
+
+    with answered as (
+      update public.chat_logs
+      set bot_response = v_answer, status = 'solved', faq_id = v_faq.id, updated_at = now()
+      where status = 'unsolved'
+        and (
+          id = v_query.chat_log_id
+          -- Legacy rows: the student's unlinked logs with the same text
+          or (
+            v_query.chat_log_id is null
+            and student_id = v_query.student_id
+            and btrim(query_text) = btrim(v_query.query_text)
+            and not exists (select 1 from public.unsolved_queries u where u.chat_log_id = chat_logs.id)
+          )
+        )
+      returning id
+    )
+    select array_agg(id) into v_chat_ids from answered;
+
+    if v_chat_ids is null then
+      insert into public.chat_logs (student_id, query_text, bot_response, faq_id, status, created_at)
+      values (v_query.student_id, btrim(v_query.query_text), v_answer, v_faq.id, 'solved', now())
+      returning array[id] into v_chat_ids;
+    end if;
+
+    delete from public.unsolved_queries where id = v_query.id;
+
+    v_results := v_results || jsonb_build_object(
+      'id', v_query.id,
+      'status', 'solved',
+      'student_id', v_query.student_id,
+      'query_text', v_query.query_text,
+      'answer', v_answer,
+      'faq', to_jsonb(v_faq),
+      'chat_log_ids', to_jsonb(v_chat_ids)
+    );
+  end loop;
+
+  return v_results;
+end;
+$$;
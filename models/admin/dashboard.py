@@ -5,4 +5,5 @@ class DashboardResponse(BaseModel):
     total_faqs: int
     solved_faqs: int
     unsolved_faqs: int
-    success_rate: float
\ No newline at end of file
+    success_rate: float
+    computed_at: str
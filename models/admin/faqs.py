@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from models.batch import MAX_BATCH_SIZE
 
 class FAQBase(BaseModel):
     question: str
@@ -7,12 +8,14 @@ class FAQBase(BaseModel):
     source_file: str | None = None
     created_by: int
     status: str = "pending"  # solved | unsolved | pending
+    language: str | None = None  # en | hi | gu; None: detected from the question's script
 
 
 class FAQUpdate(BaseModel):
     question: str | None = None
     answer: str | None = None
     status: str | None = None
+    language: str | None = None
 
 
 class FAQResponse(BaseModel):
@@ -25,3 +28,31 @@ class FAQResponse(BaseModel):
     created_at: str
     updated_at: str | None
     status: str
+    language: str | None = None
+
+
+class FAQImportJob(BaseModel):
+    id: str
+    filename: str
+    created_by: int
+    status: str  # queued | extracting | inserting | completed | failed
+    total_pages: int | None
+    pages_done: int
+    faqs_found: int
+    faqs_inserted: int
+    error: str | None
+    created_at: str
+    finished_at: str | None
+
+
+class FAQBatchPatch(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+    patch: FAQUpdate
+
+
+class FAQBatchItem(FAQUpdate):
+    id: int
+
+
+class FAQBatchUpdate(BaseModel):
+    items: list[FAQBatchItem] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
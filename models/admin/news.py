@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from models.batch import MAX_BATCH_SIZE
 
 class NewsBase(BaseModel):
     title: str
@@ -15,4 +16,17 @@ class NewsResponse(BaseModel):
     content: str
     created_at: str
     updated_at: str | None
-    created_by: int
\ No newline at end of file
+    created_by: int
+
+
+class NewsBatchPatch(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+    patch: NewsUpdate
+
+
+class NewsBatchItem(NewsUpdate):
+    id: int
+
+
+class NewsBatchUpdate(BaseModel):
+    items: list[NewsBatchItem] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
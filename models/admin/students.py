@@ -22,4 +22,19 @@ class StudentResponse(BaseModel):
     department: str
     enrollment_no: str
     role: str
-    status: str
\ No newline at end of file
+    status: str
+
+class StudentImportError(BaseModel):
+    row: int
+    error: str
+
+class StudentImportReport(BaseModel):
+    total_rows: int
+    inserted: int
+    failed: int
+    errors: list[StudentImportError]
+    errors_truncated: bool
+    elapsed_seconds: float
+    hash_seconds: float
+    insert_seconds: float
+    rows_per_second: float
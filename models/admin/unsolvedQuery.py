@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from models.batch import MAX_BATCH_SIZE
 
 class UnsolvedQuery(BaseModel):
     id: int
@@ -12,3 +13,40 @@ class UnsolvedQueryUpdate(BaseModel):
     reviewed: bool = True
     solved: bool | None = None  # optional, if marking solved
     answer: str | None = None   # optional, if moving to FAQs
+
+
+class UnsolvedResolveItem(UnsolvedQueryUpdate):
+    id: int
+
+
+class UnsolvedBatchResolve(BaseModel):
+    items: list[UnsolvedResolveItem] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class UnsolvedResolveResult(BaseModel):
+    id: int
+    status: str  # solved | reviewed | not_found
+    faq_id: int | None = None
+    chat_log_ids: list[int] | None = None
+
+
+class UnsolvedBatchResult(BaseModel):
+    results: list[UnsolvedResolveResult]
+    solved: int
+    reviewed: int
+    not_found: int
+
+
+class UnsolvedCluster(BaseModel):
+    id: int  # cluster_id: id of the query that started the cluster
+    representative: str
+    count: int
+    students: int
+    query_ids: list[int]  # first 50
+    first_seen: str | None
+    last_seen: str | None
+
+
+class UnsolvedClusterResolve(BaseModel):
+    answer: str
+    question: str | None = None  # FAQ wording; defaults to the first query's text
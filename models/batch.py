@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+
+MAX_BATCH_SIZE = 1000  # ids per batch request
+
+
+class BatchIds(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchItemResult(BaseModel):
+    id: int
+    status: str  # updated | deleted | not_found
+
+
+class BatchResult(BaseModel):
+    results: list[BatchItemResult]
+    succeeded: int
+    failed: int
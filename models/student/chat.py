@@ -5,8 +5,15 @@ class ChatRequest(BaseModel):
     query_text: str
     detected_language: str | None = "en"
 
+class ChatFrame(BaseModel):
+    id: str | int | None = None  # echoed back so pipelined replies can be matched
+    query_text: str
+    detected_language: str | None = "en"
+
 class ChatResponse(BaseModel):
     query_text: str
     bot_response: str
     status: str
     created_at: str
+    faq_id: int | None = None
+    score: float | None = None
@@ -17,6 +17,8 @@ class ChatResponse(BaseModel):
     bot_response: str
     status: str
     created_at: str
+    faq_id: int | None = None
+    score: float | None = None
 
 class NewsResponse(BaseModel):
     id: int
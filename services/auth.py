@@ -0,0 +1,123 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from os import getenv
+import jwt
+from fastapi import Depends, Header, HTTPException, Query
+
+# ------------------------------
+# JWT SETTINGS (single source for every router)
+# ------------------------------
+JWT_SECRET = getenv("JWT_SECRET", "supersecretkey")  # ⚠️ Replace in production
+JWT_ALGORITHM = "HS256"
+
+# Decoded tokens are kept in a bounded LRU keyed by the token's hash, until
+# the token's own `exp`. Repeat requests from a session skip the signature
+# check and claim parsing entirely.
+TOKEN_CACHE_SIZE = int(getenv("TOKEN_CACHE_SIZE", "10000"))
+
+
+def create_jwt_token(data: dict, expires_in: timedelta) -> str:
+    """Generate a JWT token carrying `data` that expires after `expires_in`."""
+    payload = data.copy()
+    payload["exp"] = datetime.now(timezone.utc) + expires_in
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+
+class TokenCache:
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, tuple[dict, float]]" = OrderedDict()
+
+    def get(self, key: bytes) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        claims, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def put(self, key: bytes, claims: dict, expires_at: float):
+        self._entries[key] = (claims, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache()
+
+
+def decode_token(token: str) -> dict:
+    """Returns the token's claims, verifying it only on a cache miss."""
+    key = sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is None:
+        claims = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        # Tokens without an expiry are verified every time
+        if "exp" in claims:
+            token_cache.put(key, claims, float(claims["exp"]))
+    return claims
+
+
+# ------------------------------
+# 🔒 Token Verification (FastAPI dependencies)
+# ------------------------------
+async def verify_token(authorization: str | None = Header(None)) -> dict:
+    """Verifies the `Authorization: Bearer <token>` header and returns its claims."""
+    try:
+        scheme, token = authorization.split(" ", 1)
+        if scheme.lower() != "bearer":
+            raise ValueError("Unsupported authorization scheme")
+        return decode_token(token.strip())
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+
+async def verify_stream_token(
+    token: str | None = Query(None, description="JWT, for clients such as EventSource that cannot set headers"),
+    authorization: str | None = Header(None),
+) -> dict:
+    """Like `verify_token`, but also accepts the token as a `?token=` query parameter."""
+    if token:
+        authorization = f"Bearer {token}"
+    return await verify_token(authorization)
+
+
+def require_roles(*roles: str, detail: str, verify=verify_token):
+    """Builds a dependency that only lets tokens with one of `roles` through."""
+
+    async def verify_role(decoded: dict = Depends(verify)) -> dict:
+        if decoded.get("role") not in roles:
+            raise HTTPException(status_code=403, detail=detail)
+        return decoded
+
+    return verify_role
+
+
+verify_super_admin = require_roles("super_admin", detail="Access denied — Super Admins only")
+verify_admin_or_super = require_roles("admin", "super_admin", detail="Access denied — Admin or Super Admin only")
+verify_student_or_admin = require_roles("student", "admin", "super_admin", detail="Access denied")
+verify_stream_student_or_admin = require_roles(
+    "student", "admin", "super_admin", detail="Access denied", verify=verify_stream_token
+)
+
+
+def ensure_own_student(decoded: dict, student_id: int):
+    """Students may only act on their own records; admins may act on any."""
+    if decoded.get("role") == "student" and decoded.get("student_id") != student_id:
+        raise HTTPException(status_code=403, detail="Access denied — not your account")
@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from typing import Callable
+from database import execute, supabase
+
+# ------------------------------
+# Batch mutations
+# ------------------------------
+# Admin curation (after a PDF import, at semester rollover) touches hundreds
+# of rows at once. These helpers apply a whole batch in one Supabase call
+# (one statement) instead of one per row, and report a result per requested
+# id. Callers refresh their caches once with the returned rows.
+#
+#   patch_many   same patch for every id        → UPDATE … WHERE id IN
+#   update_many  a different patch per id       → UPDATE … FROM jsonb_array_elements
+#                                                 (`update_rows` RPC, migrations/004_update_rows.sql)
+#   delete_many  delete ids                     → DELETE … WHERE id IN
+
+UPDATE_ROWS_RPC = "update_rows"
+
+
+def _results(requested: list[int], done: set[int], status: str) -> dict:
+    results = [
+        {"id": row_id, "status": status if row_id in done else "not_found"}
+        for row_id in dict.fromkeys(requested)
+    ]
+    succeeded = sum(result["status"] == status for result in results)
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+async def patch_many(table: str, ids: list[int], patch: dict) -> tuple[dict, list[dict]]:
+    """Applies one patch to every id. Returns (batch result, updated rows)."""
+    patch = {**patch, "updated_at": _now()}
+    response = await execute(supabase.table(table).update(patch).in_("id", list(dict.fromkeys(ids))))
+    rows = response.data or []
+    return _results(ids, {row["id"] for row in rows}, "updated"), rows
+
+
+async def update_many(table: str, patches: dict[int, dict]) -> tuple[dict, list[dict]]:
+    """
+    Applies a separate patch to each id in one UPDATE statement; columns
+    outside a patch are left as they are, and missing ids are skipped.
+    Returns (batch result, updated rows).
+    """
+    response = await execute(supabase.rpc(UPDATE_ROWS_RPC, {
+        "p_table": table,
+        "p_patches": [{**patch, "id": row_id} for row_id, patch in patches.items()],
+    }))
+    rows = response.data or []
+    return _results(list(patches), {row["id"] for row in rows}, "updated"), rows
+
+
+async def delete_many(table: str, ids: list[int]) -> tuple[dict, list[dict]]:
+    """Deletes every id. Returns (batch result, deleted rows)."""
+    response = await execute(supabase.table(table).delete().in_("id", list(dict.fromkeys(ids))))
+    rows = response.data or []
+    return _results(ids, {row["id"] for row in rows}, "deleted"), rows
+
+
+def update_rows_local(tables: dict[str, list[dict]], next_id: Callable[[str], int], p_table: str, p_patches: list[dict]) -> list[dict]:
+    """In-memory stand-in for the `update_rows` SQL function."""
+    if p_table not in ("faqs", "news"):
+        raise ValueError(f"update_rows: table {p_table} is not allowed")
+    patches = {patch["id"]: patch for patch in p_patches}
+    now = _now()
+    updated = []
+    for row in tables.setdefault(p_table, []):
+        patch = patches.get(row["id"])
+        if patch is not None:
+            row.update({key: value for key, value in patch.items() if key not in ("id", "updated_at")}, updated_at=now)
+            updated.append(dict(row))
+    return updated
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------
+# Async single-value cache
+# ------------------------------
+# Holds one value produced by an async loader. Within `ttl` seconds the value
+# is served as-is; for a further `stale_ttl` seconds it is still served while
+# a single background task reloads it (stale-while-revalidate). Past that, or
+# after `invalidate()`, callers wait for a fresh load. Concurrent callers
+# share one in-flight load.
+
+
+class CachedValue:
+    def __init__(self, loader: Callable[[], Awaitable[Any]], ttl: float, stale_ttl: float = 0.0):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.version = 0  # bumped whenever a new value is stored
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._value = None
+        self._loaded_at: float | None = None
+        self._generation = 0  # bumped by invalidate()
+        self._inflight: asyncio.Task | None = None
+        self._inflight_generation = -1
+
+    @property
+    def value(self):
+        return self._value
+
+    async def get(self):
+        if self._loaded_at is not None:
+            age = time.monotonic() - self._loaded_at
+            if age < self.ttl:
+                self.hits += 1
+                return self._value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._start_load()
+                return self._value
+
+        self.misses += 1
+        return await asyncio.shield(self._start_load())
+
+    def invalidate(self):
+        """Drop the cached value; the next `get()` waits for a fresh load."""
+        self._generation += 1
+        self._loaded_at = None
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "version": self.version,
+        }
+
+    def _start_load(self) -> asyncio.Task:
+        # Reuse the running load unless it started before an invalidation
+        if self._inflight is None or self._inflight.done() or self._inflight_generation != self._generation:
+            self._inflight = asyncio.create_task(self._load(self._generation))
+            self._inflight_generation = self._generation
+        return self._inflight
+
+    async def _load(self, generation: int):
+        try:
+            value = await self.loader()
+        except Exception as e:
+            if self._loaded_at is None:
+                raise
+            # Background refresh failed: keep serving the stale value
+            logger.warning("Cache refresh failed: %s", e)
+            return self._value
+
+        if generation == self._generation:
+            self._value = value
+            self._loaded_at = time.monotonic()
+            self.version += 1
+        return value
@@ -0,0 +1,178 @@
+import hashlib
+from dataclasses import dataclass, field
+from os import getenv
+import numpy as np
+from database import execute, supabase
+from services.retrieval import tokenize
+
+# ------------------------------
+# Near-duplicate clustering of unsolved queries
+# ------------------------------
+# When something changes (a timetable, a fee deadline) many students ask the
+# same question in slightly different words. Every unsolved query row
+# carries a `fingerprint` and a `cluster_id`, so clusters live in the
+# database and every worker lists and resolves the same ones
+# (migrations/003_unsolved_query_clusters.sql):
+#
+# 1. Fingerprint: the sorted set of normalized tokens. The insert trigger
+#    puts a row into the open cluster with the same fingerprint.
+# 2. Before a row is queued, this module proposes a cluster for near
+#    duplicates: MinHash over character 3-grams of the normalized text (64
+#    hashes), indexed by LSH (16 bands of 4 rows). Only clusters sharing a
+#    band bucket are compared, and the query joins the most similar one if
+#    the estimated Jaccard similarity reaches UNSOLVED_CLUSTER_THRESHOLD.
+#
+# The LSH index only knows the open rows this worker has loaded or written
+# (it is reloaded periodically), so a stale one can miss a near duplicate,
+# but it never disagrees with the database about existing membership.
+# Admins review (and resolve) clusters instead of individual rows.
+
+UNSOLVED_CLUSTER_THRESHOLD = float(getenv("UNSOLVED_CLUSTER_THRESHOLD", "0.5"))
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+# Fixed seed: signatures must agree across workers and restarts
+_rng = np.random.default_rng(20240917)
+_A = _rng.integers(1, 2 ** 32, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2 ** 32, NUM_PERM, dtype=np.uint64)
+_MASK = np.uint64(0xFFFFFFFF)
+
+
+def fingerprint(tokens: list[str], text: str) -> str:
+    return " ".join(sorted(set(tokens))) if tokens else " ".join(text.casefold().split())
+
+
+def signature(normalized: str) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint32 values) of the text's character shingles."""
+    shingles = {normalized[i:i + SHINGLE_SIZE] for i in range(max(1, len(normalized) - SHINGLE_SIZE + 1))}
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # (a·x + b) mod 2³² per permutation; uint64 wrap-around keeps the low 32 bits exact
+    return ((np.outer(_A, hashes) + _B[:, None]) & _MASK).min(axis=1).astype(np.uint32)
+
+
+@dataclass
+class QueryCluster:
+    id: int
+    signature: np.ndarray
+    fingerprints: set[str] = field(default_factory=set)
+    members: set[int] = field(default_factory=set)  # query ids
+
+
+class UnsolvedClusters:
+    def __init__(self, threshold: float = UNSOLVED_CLUSTER_THRESHOLD):
+        self.threshold = threshold
+        self._reset()
+
+    def _reset(self):
+        self._clusters: dict[int, QueryCluster] = {}
+        self._by_fingerprint: dict[str, int] = {}
+        self._by_query: dict[int, int] = {}
+        self._buckets: list[dict[bytes, set[int]]] = [{} for _ in range(BANDS)]
+
+    def __len__(self):
+        return len(self._clusters)
+
+    async def load(self):
+        """Rebuild the index from every unreviewed row of `unsolved_queries`."""
+        response = await execute(
+            supabase.table("unsolved_queries")
+            .select("id, query_text, cluster_id")
+            .eq("reviewed", False)
+            .order("id")
+        )
+        self._reset()
+        self.add_many(response.data or [])
+
+    def add_many(self, rows: list[dict]):
+        """Index freshly stored unsolved query rows (write-behind flush listener)."""
+        for row in rows:
+            self.add(row)
+
+    def add(self, row: dict) -> int:
+        """Index one stored row under its cluster; returns the cluster id."""
+        if row["id"] in self._by_query:
+            return self._by_query[row["id"]]
+
+        text = row.get("query_text") or ""
+        tokens = tokenize(text)
+        fp = fingerprint(tokens, text)
+        cluster_id = row.get("cluster_id") or row["id"]
+
+        cluster = self._clusters.get(cluster_id)
+        if cluster is None:
+            sig = signature(" ".join(tokens) or fp)
+            cluster = self._clusters[cluster_id] = QueryCluster(cluster_id, sig)
+            for band, key in enumerate(self._band_keys(sig)):
+                self._buckets[band].setdefault(key, set()).add(cluster_id)
+        self._by_fingerprint.setdefault(fp, cluster_id)
+        cluster.fingerprints.add(fp)
+        cluster.members.add(row["id"])
+        self._by_query[row["id"]] = cluster_id
+        return cluster_id
+
+    def suggest(self, text: str) -> tuple[str, int | None]:
+        """
+        The query's fingerprint, and the open cluster it should join (None:
+        let the database join it by fingerprint or start a new cluster).
+        """
+        tokens = tokenize(text)
+        fp = fingerprint(tokens, text)
+        cluster_id = self._by_fingerprint.get(fp)
+        if cluster_id is None:
+            cluster_id = self._nearest(signature(" ".join(tokens) or fp))
+        return fp, cluster_id
+
+    def discard(self, query_ids: list[int]):
+        """Forget resolved / reviewed queries; empty clusters are dropped."""
+        for query_id in query_ids:
+            cluster_id = self._by_query.pop(query_id, None)
+            if cluster_id is None:
+                continue
+            cluster = self._clusters[cluster_id]
+            cluster.members.discard(query_id)
+            if not cluster.members:
+                self._drop(cluster)
+
+    def stats(self) -> dict:
+        return {
+            "clusters": len(self._clusters),
+            "queries": len(self._by_query),
+            "threshold": self.threshold,
+        }
+
+    def _nearest(self, sig: np.ndarray) -> int | None:
+        candidates = set()
+        for band, key in enumerate(self._band_keys(sig)):
+            candidates |= self._buckets[band].get(key, set())
+        best_id, best_score = None, self.threshold
+        for cluster_id in candidates:
+            score = float(np.mean(self._clusters[cluster_id].signature == sig))
+            if score >= best_score:
+                best_id, best_score = cluster_id, score
+        return best_id
+
+    def _drop(self, cluster: QueryCluster):
+        del self._clusters[cluster.id]
+        for fp in cluster.fingerprints:
+            if self._by_fingerprint.get(fp) == cluster.id:
+                del self._by_fingerprint[fp]
+        for band, key in enumerate(self._band_keys(cluster.signature)):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(cluster.id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    @staticmethod
+    def _band_keys(sig: np.ndarray) -> list[bytes]:
+        return [sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes() for band in range(BANDS)]
+
+
+# Process-wide LSH index, fed by the chat log writer
+unsolved_clusters = UnsolvedClusters()
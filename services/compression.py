@@ -0,0 +1,221 @@
+import gzip
+import time
+from os import getenv
+from anyio import to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from services.conditional import encoded_etag
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# ------------------------------
+# Negotiated response compression
+# ------------------------------
+# Full-table lists (FAQs, news, students, chat history) are mostly repeated
+# JSON keys and compress 5-10x, and on campus Wi-Fi / mobile data transfer
+# time dominates latency. Responses are compressed with brotli (if the
+# `brotli` package is installed) or gzip, as negotiated by Accept-Encoding.
+#
+# - Bodies under COMPRESSION_MIN_SIZE bytes are sent as-is: the CPU and the
+#   header overhead would cost more than the bytes saved.
+# - Bodies of COMPRESSION_OFFLOAD_SIZE bytes or more are compressed in a
+#   worker thread (zlib and brotli release the GIL), so a large list does
+#   not stall the event loop for other requests.
+# - Event streams, non-text types and already-encoded responses pass
+#   through untouched; WebSockets never reach this middleware.
+# - An encoded body gets its own strong ETag (the coding appended, see
+#   services/conditional.py), and every buffered response varies on
+#   Accept-Encoding.
+#
+# Bytes before / after compression are counted per route template and served
+# by GET /admin/dashboard/internals.
+
+COMPRESSION_MIN_SIZE = int(getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_OFFLOAD_SIZE = int(getenv("COMPRESSION_OFFLOAD_SIZE", "65536"))
+GZIP_LEVEL = int(getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+UNCOMPRESSIBLE_TYPES = ("text/event-stream",)
+
+
+def _compress_gzip(body: bytes) -> bytes:
+    # mtime=0: identical bodies give identical bytes
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _compress_br(body: bytes) -> bytes:
+    return brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+ENCODERS = {"gzip": _compress_gzip}
+if brotli is not None:
+    ENCODERS["br"] = _compress_br
+# Preferred first when the client weighs them equally
+PREFERENCE = ("br", "gzip")
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """Picks the best supported encoding from an Accept-Encoding header, or None."""
+    weights = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in PREFERENCE:
+        if coding not in ENCODERS:
+            continue
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def is_compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    if content_type.startswith(UNCOMPRESSIBLE_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionStats:
+    def __init__(self):
+        self._routes: dict[str, dict] = {}
+
+    def record(self, route: str, encoding: str | None, raw: int, sent: int, seconds: float = 0.0):
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = {
+                "responses": 0,
+                "compressed": 0,
+                "bytes_in": 0,
+                "bytes_out": 0,
+                "compress_seconds": 0.0,
+                "encodings": {},
+            }
+        stats["responses"] += 1
+        stats["bytes_in"] += raw
+        stats["bytes_out"] += sent
+        if encoding:
+            stats["compressed"] += 1
+            stats["compress_seconds"] += seconds
+            stats["encodings"][encoding] = stats["encodings"].get(encoding, 0) + 1
+
+    def stats(self) -> dict:
+        routes = {
+            route: {
+                **stats,
+                "compress_seconds": round(stats["compress_seconds"], 4),
+                "ratio": round(stats["bytes_out"] / stats["bytes_in"], 3) if stats["bytes_in"] else None,
+            }
+            for route, stats in sorted(self._routes.items())
+        }
+        bytes_in = sum(stats["bytes_in"] for stats in self._routes.values())
+        bytes_out = sum(stats["bytes_out"] for stats in self._routes.values())
+        return {
+            "encodings": sorted(ENCODERS),
+            "min_size": COMPRESSION_MIN_SIZE,
+            "offload_size": COMPRESSION_OFFLOAD_SIZE,
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "routes": routes,
+        }
+
+
+compression_stats = CompressionStats()
+
+
+def route_name(scope) -> str:
+    """Route template ("/admin/faqs/{faq_id}") so ids do not split the metrics."""
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path', None) or 'unmatched'}"
+
+
+class CompressionMiddleware:
+    """ASGI middleware: compresses eligible responses per the module notes above."""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, offload_size: int = COMPRESSION_OFFLOAD_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        start_message = None
+        chunks: list[bytes] = []
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if not is_compressible(headers):
+                    # Streams and binary bodies: no buffering, no metrics
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            await self._finish(scope, send, start_message, b"".join(chunks), encoding)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _finish(self, scope, send, start_message, body: bytes, encoding: str | None):
+        headers = MutableHeaders(raw=start_message["headers"])
+        if "accept-encoding" not in headers.get("vary", "").lower():
+            headers.add_vary_header("Accept-Encoding")
+        route = route_name(scope)
+
+        if encoding is None or len(body) < self.minimum_size:
+            compression_stats.record(route, None, len(body), len(body))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        started = time.perf_counter()
+        encoder = ENCODERS[encoding]
+        if len(body) >= self.offload_size:
+            compressed = await to_thread.run_sync(encoder, body)
+        else:
+            compressed = encoder(body)
+        elapsed = time.perf_counter() - started
+
+        headers["Content-Encoding"] = encoding
+        headers["Content-Length"] = str(len(compressed))
+        if "etag" in headers:
+            headers["ETag"] = encoded_etag(headers["etag"], encoding)
+        compression_stats.record(route, encoding, len(body), len(compressed), elapsed)
+        await send(start_message)
+        await send({"type": "http.response.body", "body": compressed})
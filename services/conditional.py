@@ -0,0 +1,146 @@
+import hashlib
+import json
+import secrets
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+from services.cache import CachedValue
+
+# ------------------------------
+# Conditional GET (ETag / Last-Modified)
+# ------------------------------
+# Polled read endpoints tag their responses with a strong ETag, plus a
+# Last-Modified stamp where one can be derived safely. A client that sends
+# back a matching `If-None-Match` (or, without one, an `If-Modified-Since`
+# that is not older than the data) gets an empty 304.
+#
+# Endpoints backed by an in-memory snapshot (news) derive the validators
+# from the snapshot version and answer 304 without touching Supabase. So do
+# endpoints whose writes all bump a version in this worker (/admin/faqs: the
+# FAQ index version; /admin/unsolved: a `VersionCounter`): their ETag hashes
+# that version with the request's filters and page, and is checked before
+# the query runs. Those versions are per process (except a shared FAQ
+# snapshot's), so the tags carry INSTANCE_ID and only validate against the
+# worker that issued them; other workers' writes show up within the
+# counter's ttl (the FAQ index: its periodic refresh). The remaining
+# endpoints hash the rows they fetched (ETag only, since rows can change or
+# disappear without a newer timestamp), which saves serialization and egress.
+#
+# The compression middleware sends a gzip / brotli body under the ETag with
+# the coding appended ("<hash>-gzip"), so each representation has its own
+# strong validator, and every response varies on Accept-Encoding. A client
+# revalidating an encoded copy matches the handler's plain tag and gets its
+# own tag back on the 304.
+
+CACHE_CONTROL = "private, no-cache"
+# Different in every worker process, and after every restart
+INSTANCE_ID = secrets.token_hex(8)
+# Content codings the compression middleware appends to ETags
+ETAG_CODINGS = ("gzip", "br")
+
+
+def etag_for(payload) -> str:
+    """Strong ETag of a JSON-serializable payload (stable across workers)."""
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.blake2b(raw.encode(), digest_size=16).hexdigest() + '"'
+
+
+class VersionCounter:
+    """
+    Version of a resource, bumped by this worker's write paths. Writes made
+    through other workers are not seen, so it also moves on by itself once
+    `ttl` seconds pass without a bump.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self._bumped_at = time.monotonic()
+
+    def bump(self, *_):
+        """Marks the resource changed (also usable as a write-behind flush listener)."""
+        self.version += 1
+        self._bumped_at = time.monotonic()
+
+    @property
+    def revision(self) -> str:
+        if time.monotonic() - self._bumped_at >= self.ttl:
+            self.bump()
+        return f"{INSTANCE_ID}:{self.version}"
+
+
+_snapshot_validators: dict[int, tuple[int, str, datetime]] = {}
+
+
+def snapshot_validators(cache: CachedValue) -> tuple[str, datetime]:
+    """
+    ETag and Last-Modified of the value currently held by `cache`, computed
+    once per cache version. Last-Modified is when this worker first served
+    that version: never earlier than the change itself, even for deletes,
+    which a max(updated_at) over the remaining rows would miss.
+    """
+    cached = _snapshot_validators.get(id(cache))
+    if cached is None or cached[0] != cache.version:
+        cached = (cache.version, etag_for(cache.value), datetime.now(timezone.utc))
+        _snapshot_validators[id(cache)] = cached
+    return cached[1], cached[2]
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """ETag of the `coding`-encoded representation: '"abc"' → '"abc-gzip"'."""
+    if etag.startswith("W/") or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{coding}"'
+
+
+def _matching_etag(header: str, etag: str) -> str | None:
+    """The tag in If-None-Match matching `etag` (or an encoded form of it), or None."""
+    if header.strip() == "*":
+        return etag
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    for tag in header.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag == etag or tag in (encoded_etag(etag, coding) for coding in ETAG_CODINGS):
+            return tag
+    return None
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have one-second resolution
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: datetime | None = None,
+) -> Response | None:
+    """
+    Sets the validators on `response` and returns a 304 response when the
+    client's copy is still current; returns None when the full body should
+    be sent.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        matched = _matching_etag(if_none_match, etag)
+        fresh = matched is not None
+        if fresh:
+            headers["ETag"] = matched
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = bool(if_modified_since and last_modified and _not_modified_since(if_modified_since, last_modified))
+
+    if fresh:
+        return Response(status_code=304, headers=headers)
+    return None
@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import time
+from base64 import b64decode, b64encode
+from concurrent.futures import ThreadPoolExecutor
+from os import getenv
+
+# ------------------------------
+# Password hashing service
+# ------------------------------
+# Passwords are hashed with scrypt, a memory-hard KDF (~16 MiB and tens of
+# milliseconds per hash). Running that inline would stall the event loop, so
+# every hash/verify runs on a dedicated, size-limited thread pool (hashlib
+# releases the GIL inside scrypt). A semaphore caps the jobs handed to the
+# pool; callers beyond that wait in line, and the wait is recorded so login
+# throughput can be tuned with KDF_WORKERS alone.
+#
+# Legacy rows hold an unsalted sha256 hex digest. They still verify, and
+# `verify_password` reports them as needing a rehash.
+
+KDF_WORKERS = int(getenv("KDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p, dklen=KEY_BYTES, maxmem=256 * n * r + 1024 * 1024
+    )
+
+
+def _hash(password: str) -> str:
+    salt = os.urandom(SALT_BYTES)
+    key = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${b64encode(salt).decode()}${b64encode(key).decode()}"
+
+
+def _verify(password: str, stored: str) -> tuple[bool, bool]:
+    if stored.startswith("scrypt$"):
+        _, n, r, p, salt, key = stored.split("$")
+        n, r, p = int(n), int(r), int(p)
+        candidate = _scrypt(password, b64decode(salt), n, r, p)
+        valid = hmac.compare_digest(candidate, b64decode(key))
+        return valid, valid and (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+    # Legacy unsalted sha256 hex digest
+    legacy = hashlib.sha256(password.encode()).hexdigest()
+    valid = hmac.compare_digest(legacy, stored)
+    return valid, valid
+
+
+class CredentialService:
+    def __init__(self, workers: int = KDF_WORKERS):
+        self.workers = workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._waiting = 0
+        self._running = 0
+        self._counters = {
+            "jobs": 0,
+            "rehashes": 0,
+            "total_queue_ms": 0.0,
+            "max_queue_ms": 0.0,
+            "total_run_ms": 0.0,
+        }
+
+    async def hash_password(self, password: str) -> str:
+        return await self._submit(_hash, password)
+
+    async def verify_password(self, password: str, stored: str | None) -> tuple[bool, bool]:
+        """Returns (valid, needs_rehash) for `password` against a stored hash."""
+        if not stored:
+            return False, False
+        return await self._submit(_verify, password, stored)
+
+    def record_rehash(self):
+        self._counters["rehashes"] += 1
+
+    def stats(self) -> dict:
+        jobs = self._counters["jobs"]
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "waiting": self._waiting,
+            "jobs": jobs,
+            "rehashes": self._counters["rehashes"],
+            "avg_queue_ms": round(self._counters["total_queue_ms"] / jobs, 3) if jobs else 0.0,
+            "max_queue_ms": round(self._counters["max_queue_ms"], 3),
+            "avg_run_ms": round(self._counters["total_run_ms"] / jobs, 3) if jobs else 0.0,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, fn, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="kdf")
+            self._semaphore = asyncio.Semaphore(self.workers)
+
+        queued = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        started = time.perf_counter()
+        self._running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._semaphore.release()
+            self._running -= 1
+            queue_ms = (started - queued) * 1000
+            self._counters["jobs"] += 1
+            self._counters["total_queue_ms"] += queue_ms
+            self._counters["max_queue_ms"] = max(self._counters["max_queue_ms"], queue_ms)
+            self._counters["total_run_ms"] += (time.perf_counter() - started) * 1000
+
+
+# Shared by every login and password-changing endpoint
+passwords = CredentialService()
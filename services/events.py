@@ -0,0 +1,119 @@
+import asyncio
+import itertools
+import json
+from collections import deque
+from os import getenv
+
+# ------------------------------
+# In-process event broker
+# ------------------------------
+# Fans out small JSON events to long-lived client connections (SSE). Each
+# connection owns a Subscription: a bounded buffer plus an asyncio.Event,
+# so an idle connection costs a few hundred bytes and no polling. Every
+# event is encoded once, however many subscribers receive it. When a slow
+# client's buffer overflows, the oldest events are dropped and the client
+# is told to resync (refetch) instead of stalling the publisher.
+#
+# Topics: "news" (every connection) and "student:<id>" (one student).
+# The broker is per worker process.
+
+EVENTS_BUFFER_SIZE = int(getenv("EVENTS_BUFFER_SIZE", "64"))
+EVENTS_MAX_CONNECTIONS = int(getenv("EVENTS_MAX_CONNECTIONS", "10000"))
+EVENTS_HEARTBEAT_SECONDS = float(getenv("EVENTS_HEARTBEAT_SECONDS", "20"))
+
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+HEARTBEAT_FRAME = b": ping\n\n"
+
+
+def encode_event(event_id: int, event_type: str, data: dict) -> bytes:
+    payload = json.dumps(data, separators=(",", ":"), default=str)
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n".encode()
+
+
+class Subscription:
+    __slots__ = ("topics", "buffer", "ready", "dropped")
+
+    def __init__(self, topics: tuple[str, ...], buffer_size: int):
+        self.topics = topics
+        self.buffer: deque[bytes] = deque(maxlen=buffer_size)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def push(self, frame: bytes):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(frame)
+        self.ready.set()
+
+    async def next(self, timeout: float) -> bytes | None:
+        """
+        Waits up to `timeout` seconds and returns every buffered frame as one
+        chunk, or None if nothing arrived (time for a heartbeat).
+        """
+        if not self.buffer:
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        self.ready.clear()
+
+        chunk = b"".join(self.buffer)
+        self.buffer.clear()
+        if self.dropped:
+            self.dropped = 0
+            chunk = RESYNC_FRAME + chunk
+        return chunk
+
+
+class EventBroker:
+    def __init__(self, buffer_size: int = EVENTS_BUFFER_SIZE, max_connections: int = EVENTS_MAX_CONNECTIONS):
+        self.buffer_size = buffer_size
+        self.max_connections = max_connections
+        self._topics: dict[str, set[Subscription]] = {}
+        self._ids = itertools.count(1)
+        self.connections = 0
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, *topics: str) -> Subscription | None:
+        """Returns a new subscription, or None when the worker is at capacity."""
+        if self.connections >= self.max_connections:
+            return None
+        subscription = Subscription(topics, self.buffer_size)
+        for topic in topics:
+            self._topics.setdefault(topic, set()).add(subscription)
+        self.connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for topic in subscription.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[topic]
+        self.connections -= 1
+
+    def publish(self, topic: str, event_type: str, data: dict):
+        """Queues an event for every subscriber of `topic` (never blocks)."""
+        self.published += 1
+        subscribers = self._topics.get(topic)
+        if not subscribers:
+            return
+        frame = encode_event(next(self._ids), event_type, data)
+        for subscription in subscribers:
+            subscription.push(frame)
+        self.delivered += len(subscribers)
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.connections,
+            "topics": len(self._topics),
+            "published": self.published,
+            "delivered": self.delivered,
+            "max_connections": self.max_connections,
+            "buffer_size": self.buffer_size,
+        }
+
+
+broker = EventBroker()
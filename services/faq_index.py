@@ -0,0 +1,305 @@
+import asyncio
+import logging
+import time
+from os import getenv
+from anyio import to_thread
+from database import execute, supabase
+from services import faq_snapshot
+from services.conditional import INSTANCE_ID
+from services.language import DEFAULT_LANGUAGE, resolve_language, tokenize_for
+from services.retrieval import BM25Index
+
+# ------------------------------
+# In-memory FAQ match index
+# ------------------------------
+# The chat endpoints used to pull the whole `faqs` table on every message and
+# lower-case every question in a Python loop. This index is loaded once at
+# startup, keeps the questions already tokenized and is patched in place by
+# the admin write endpoints, so matching never touches Supabase. Ranking is
+# done by the BM25 engine in `services.retrieval`.
+#
+# FAQs are split into one shard per language: a row's `language` column
+# (set by admins, e.g. "hi" for a Hindi FAQ typed in Latin script), else the
+# script of its question. A query is ranked against the shard of its
+# `detected_language` only, then against the default shard if nothing
+# there is confident enough.
+#
+# With FAQ_SNAPSHOT_PATH set, the shards are not kept per worker: they are
+# written to a shared, memory-mapped snapshot (see `services.faq_snapshot`)
+# that every worker on the box maps. An edit makes one worker rebuild the
+# snapshot from the `faqs` table (others that raced it reuse its file) and
+# each worker swaps to a new file as soon as it notices it.
+
+logger = logging.getLogger(__name__)
+
+# Minimum confidence (0–1) for a query to count as answered by an FAQ
+FAQ_MATCH_THRESHOLD = float(getenv("FAQ_MATCH_THRESHOLD", "0.6"))
+# How long a chat request waits for the startup load before matching anyway
+FAQ_INDEX_WAIT_SECONDS = float(getenv("FAQ_INDEX_WAIT_SECONDS", "10"))
+# Shared snapshot file; unset keeps a private index in every worker
+FAQ_SNAPSHOT_PATH = getenv("FAQ_SNAPSHOT_PATH") or None
+# How often workers check the snapshot file for a new version
+FAQ_SNAPSHOT_POLL_SECONDS = float(getenv("FAQ_SNAPSHOT_POLL_SECONDS", "1"))
+# A (periodic) load rebuilds the snapshot only once it is older than this
+FAQ_SNAPSHOT_MAX_AGE = float(getenv("FAQ_SNAPSHOT_MAX_AGE", "60"))
+# 0: never build, only map what a sidecar (`python -m services.faq_snapshot`) writes
+FAQ_SNAPSHOT_BUILDER = getenv("FAQ_SNAPSHOT_BUILDER", "1") == "1"
+
+
+class Shard:
+    """One language's FAQs: parallel id / answer lists and their BM25 engine."""
+
+    __slots__ = ("ids", "answers", "engine")
+
+    def __init__(self, ids: list[int], answers: list[str], docs: list[list[str]]):
+        self.ids = ids
+        self.answers = answers
+        self.engine = BM25Index(docs)
+
+
+def build_shards(entries: dict[int, tuple[str, list[str], str]]) -> dict[str, Shard]:
+    """Groups (language, question tokens, answer) entries into per-language shards."""
+    grouped: dict[str, tuple[list[int], list[str], list[list[str]]]] = {}
+    for faq_id, (language, tokens, answer) in entries.items():
+        ids, answers, docs = grouped.setdefault(language, ([], [], []))
+        ids.append(faq_id)
+        answers.append(answer)
+        docs.append(tokens)
+    return {language: Shard(*columns) for language, columns in grouped.items()}
+
+
+class FAQIndex:
+    def __init__(
+        self,
+        threshold: float = FAQ_MATCH_THRESHOLD,
+        snapshot_path: str | None = FAQ_SNAPSHOT_PATH,
+        builder: bool = FAQ_SNAPSHOT_BUILDER,
+    ):
+        self.threshold = threshold
+        if snapshot_path and faq_snapshot.fcntl is None:
+            logger.warning("FAQ_SNAPSHOT_PATH needs file locks (fcntl); keeping a per-worker index")
+            snapshot_path = None
+        self.snapshot_path = snapshot_path
+        self.builder = builder
+        self._snapshot: faq_snapshot.MappedSnapshot | None = None
+        self._watcher: asyncio.Task | None = None
+        self._entries: dict[int, tuple[str, list[str], str]] = {}  # id -> (language, question tokens, answer)
+        self._shards: dict[str, Shard] = {}
+        self._lock = asyncio.Lock()
+        self.version = 0
+        self.loaded = False
+        self._loaded_event = asyncio.Event()
+
+    def __len__(self):
+        return sum(len(shard.ids) for shard in self._shards.values())
+
+    @property
+    def revision(self) -> str:
+        """
+        Identifies the FAQs this worker holds, for ETags: the version of the
+        shared snapshot (the same in every worker mapping it) or of this
+        process's private index. Bumped by every FAQ write path.
+        """
+        if self._snapshot is not None:
+            return f"snapshot:{self._snapshot.loaded_at}:{self.version}"
+        return f"{INSTANCE_ID}:{self.version}"
+
+    def shard_sizes(self) -> dict[str, int]:
+        return {language: len(shard.ids) for language, shard in self._shards.items()}
+
+    @staticmethod
+    def _entry(row: dict) -> tuple[str, list[str], str]:
+        language = resolve_language(row.get("language"), row.get("question"))
+        return language, tokenize_for(language, row.get("question")), row.get("answer") or ""
+
+    async def load(self, rows: list[dict] | None = None):
+        """(Re)build the index from `rows`, or from the `faqs` table."""
+        if self.snapshot_path:
+            if rows is not None:
+                await self._publish(rows)
+            else:
+                await self._sync(since=time.time() - FAQ_SNAPSHOT_MAX_AGE)
+            self.loaded = True
+            self._loaded_event.set()
+            return
+        if rows is None:
+            response = await execute(supabase.table("faqs").select("id, question, answer, language"))
+            rows = response.data or []
+        self._entries = {row["id"]: self._entry(row) for row in rows}
+        await self._rebuild()
+        self.loaded = True
+        self._loaded_event.set()
+
+    async def wait_loaded(self, timeout: float = FAQ_INDEX_WAIT_SECONDS) -> bool:
+        """Waits (up to `timeout`) for the first load, so a cold worker does not answer from an empty index."""
+        if self.loaded:
+            return True
+        try:
+            await asyncio.wait_for(self._loaded_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def upsert(self, row: dict):
+        """Add or replace a single FAQ row (as returned by Supabase)."""
+        await self.upsert_many([row])
+
+    async def upsert_many(self, rows: list[dict]):
+        """Add or replace several FAQ rows with a single rebuild."""
+        if self.snapshot_path:
+            if rows:
+                await self._sync(since=time.time())
+            return
+        for row in rows:
+            language, tokens, answer = self._entries.get(row["id"], (DEFAULT_LANGUAGE, [], ""))
+            if row.get("question") is not None:
+                language, tokens, _ = self._entry(row)
+            if row.get("answer") is not None:
+                answer = row["answer"]
+            self._entries[row["id"]] = (language, tokens, answer)
+        if rows:
+            await self._rebuild()
+
+    async def remove(self, faq_id: int):
+        await self.remove_many([faq_id])
+
+    async def remove_many(self, faq_ids: list[int]):
+        """Drop several FAQs with a single rebuild."""
+        if self.snapshot_path:
+            if faq_ids:
+                await self._sync(since=time.time())
+            return
+        removed = [faq_id for faq_id in faq_ids if self._entries.pop(faq_id, None) is not None]
+        if removed:
+            await self._rebuild()
+
+    def search(self, query_text: str, k: int = 5, language: str | None = None) -> list[tuple[int, float]]:
+        """Returns the top-k (faq_id, confidence) pairs of the query's shard, best first."""
+        language = resolve_language(language, query_text)
+        shard = self._shards.get(language)
+        if shard is None:
+            return []
+        return [(int(shard.ids[doc_no]), score) for doc_no, score in shard.engine.search(tokenize_for(language, query_text), k)]
+
+    def match(self, query_text: str, language: str | None = None) -> tuple[int, str, float] | None:
+        """
+        Returns (faq_id, answer, confidence) of the best FAQ for the query,
+        or None when nothing reaches the confidence threshold. Only the
+        query's language shard is searched, then the default shard.
+        """
+        shards = self._shards
+        language = resolve_language(language, query_text)
+        for shard_language in dict.fromkeys((language, DEFAULT_LANGUAGE)):
+            shard = shards.get(shard_language)
+            if shard is None:
+                continue
+            hits = shard.engine.search(tokenize_for(shard_language, query_text), k=1)
+            if hits and hits[0][1] >= self.threshold:
+                doc_no, score = hits[0]
+                return int(shard.ids[doc_no]), shard.answers[doc_no], score
+        return None
+
+    async def _rebuild(self):
+        # Rebuilds are serialized so each one includes every earlier edit, and
+        # the matrices are built on a worker thread to keep the event loop free
+        async with self._lock:
+            entries = dict(self._entries)
+            shards = await to_thread.run_sync(build_shards, entries)
+
+            # Swap everything together so readers never see a half-built index
+            self._shards = shards
+            self.version += 1
+
+
+    # ------------------------------
+    # Shared snapshot mode
+    # ------------------------------
+    async def _sync(self, since: float):
+        """
+        Makes sure the snapshot holds every FAQ written before `since`, then
+        maps it. Whoever holds the file lock rebuilds; workers that queued
+        behind it find a snapshot read after `since` and just map that one.
+        """
+        if not self.builder:
+            await self._wait_for_snapshot()
+            return
+        async with self._lock, faq_snapshot.BuildLock(self.snapshot_path):
+            header = await to_thread.run_sync(faq_snapshot.read_header, self.snapshot_path)
+            if header is None or header["loaded_at"] < since:
+                loaded_at = time.time()
+                response = await execute(supabase.table("faqs").select("id, question, answer, language"))
+                await self._write(response.data or [], loaded_at, header)
+        await self._remap()
+
+    async def rebuild_snapshot(self):
+        """Rebuilds the snapshot from the `faqs` table now (the sidecar builder)."""
+        await self._sync(since=time.time())
+
+    async def _publish(self, rows: list[dict]):
+        async with self._lock, faq_snapshot.BuildLock(self.snapshot_path):
+            header = await to_thread.run_sync(faq_snapshot.read_header, self.snapshot_path)
+            await self._write(rows, time.time(), header)
+        await self._remap()
+
+    async def _write(self, rows: list[dict], loaded_at: float, header: dict | None):
+        version = (header["version"] if header else 0) + 1
+
+        def build():
+            shards = build_shards({row["id"]: self._entry(row) for row in rows})
+            faq_snapshot.write_snapshot(self.snapshot_path, shards, version, loaded_at)
+
+        await to_thread.run_sync(build)
+        logger.info("Wrote FAQ snapshot v%d (%d FAQs)", version, len(rows))
+
+    async def _wait_for_snapshot(self):
+        while faq_snapshot.file_identity(self.snapshot_path) is None:
+            await asyncio.sleep(FAQ_SNAPSHOT_POLL_SECONDS)
+        await self._remap()
+
+    async def _remap(self):
+        identity = faq_snapshot.file_identity(self.snapshot_path)
+        if identity is None or (self._snapshot is not None and self._snapshot.identity == identity):
+            return
+        snapshot = await to_thread.run_sync(faq_snapshot.MappedSnapshot, self.snapshot_path)
+        if self._snapshot is not None and snapshot.version < self._snapshot.version:
+            return
+        # The old mapping is released once the last in-flight match drops it
+        self._snapshot = snapshot
+        self._shards = snapshot.shards
+        self.version = snapshot.version
+        if not self.loaded:
+            self.loaded = True
+            self._loaded_event.set()
+
+    def start_watcher(self):
+        """Hot-swap to snapshots written by other workers (no-op without FAQ_SNAPSHOT_PATH)."""
+        if self.snapshot_path and self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def stop_watcher(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(FAQ_SNAPSHOT_POLL_SECONDS)
+            try:
+                await self._remap()
+            except Exception:
+                logger.exception("Could not map FAQ snapshot %s", self.snapshot_path)
+
+    def stats(self) -> dict:
+        stats = {"faqs": len(self), "shards": self.shard_sizes(), "version": self.version, "snapshot": None}
+        if self._snapshot is not None:
+            stats["snapshot"] = {
+                "path": self.snapshot_path,
+                "mapped_bytes": self._snapshot.nbytes,
+                "loaded_at": self._snapshot.loaded_at,
+            }
+        return stats
+
+
+# Process-wide index shared by the student and admin routers
+faq_index = FAQIndex()
@@ -0,0 +1,269 @@
+import asyncio
+import json
+import mmap
+import os
+import struct
+import zlib
+import numpy as np
+from services.retrieval import BM25Index
+
+try:
+    import fcntl
+except ImportError:  # Windows: no shared snapshots, every worker keeps its own index
+    fcntl = None
+
+# ------------------------------
+# Shared, memory-mapped FAQ index snapshot
+# ------------------------------
+# With several uvicorn workers per box, a private FAQ index per worker costs
+# its memory N times and is rebuilt N times on every admin edit. With
+# FAQ_SNAPSHOT_PATH set, the index is instead written once to a compact,
+# read-only file that every worker maps: the pages are shared through the
+# page cache, so memory per box scales with the index, not with workers.
+#
+# File layout (little endian, arrays 64-byte aligned):
+#
+#   b"FAQSNAP1" | header offset (u64) | header length (u64) | arrays … | header
+#
+# The JSON header holds the snapshot version, when its rows were read from
+# the database and, per language shard, the (dtype, count, offset) of:
+#
+#   ids          int64    FAQ id of each document
+#   answer_offs  int64    answer i is answer_blob[answer_offs[i]:answer_offs[i+1]]
+#   answer_blob  uint8    UTF-8 answers
+#   term_offs    int64    term t is term_blob[term_offs[t]:term_offs[t+1]]
+#   term_blob    uint8    UTF-8 terms, in term id order
+#   term_slots   int32    open-addressing table, crc32(term) → term id (-1 empty)
+#   idf          float32  BM25 arrays, as in retrieval.BM25Index
+#   indptr       int32
+#   indices      int32
+#   weights      float32
+#
+# Nothing is parsed or copied on load: every array is an np.frombuffer view
+# of the mapping. A new version is written to a temp file and renamed over
+# the old one, so readers only ever see complete snapshots; workers notice
+# the new inode and swap to it.
+
+MAGIC = b"FAQSNAP1"
+PRELUDE = struct.Struct("<8sQQ")
+FORMAT_VERSION = 1
+ALIGN = 64
+
+
+def _term_slots(terms: list[bytes]) -> np.ndarray:
+    size = 1
+    while size < max(2 * len(terms), 8):
+        size *= 2
+    mask = size - 1
+    slots = np.full(size, -1, dtype=np.int32)
+    for term_id, term in enumerate(terms):
+        slot = zlib.crc32(term) & mask
+        while slots[slot] != -1:
+            slot = (slot + 1) & mask
+        slots[slot] = term_id
+    return slots
+
+
+def _blob(values: list[bytes]) -> tuple[np.ndarray, np.ndarray]:
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in values], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(values), dtype=np.uint8)
+
+
+def shard_arrays(shard) -> tuple[dict[str, np.ndarray], float]:
+    """The arrays stored for one `faq_index.Shard`, and its max idf."""
+    engine = shard.engine
+    terms = [term.encode() for term, _ in sorted(engine.vocabulary.items(), key=lambda item: item[1])]
+    answer_offs, answer_blob = _blob([answer.encode() for answer in shard.answers])
+    term_offs, term_blob = _blob(terms)
+    return {
+        "ids": np.asarray(shard.ids, dtype=np.int64),
+        "answer_offs": answer_offs,
+        "answer_blob": answer_blob,
+        "term_offs": term_offs,
+        "term_blob": term_blob,
+        "term_slots": _term_slots(terms),
+        "idf": np.asarray(engine.idf, dtype=np.float32),
+        "indptr": np.asarray(engine.indptr, dtype=np.int32),
+        "indices": np.asarray(engine.indices, dtype=np.int32),
+        "weights": np.asarray(engine.weights, dtype=np.float32),
+    }, engine.max_idf
+
+
+def write_snapshot(path: str, shards: dict, version: int, loaded_at: float):
+    """Atomically replaces `path` with a snapshot of `shards` (language → Shard)."""
+    header = {"format": FORMAT_VERSION, "version": version, "loaded_at": loaded_at, "shards": {}}
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * PRELUDE.size)
+        for language, shard in shards.items():
+            arrays, max_idf = shard_arrays(shard)
+            layout = {}
+            for name, array in arrays.items():
+                f.write(b"\0" * (-f.tell() % ALIGN))
+                layout[name] = [array.dtype.str, len(array), f.tell()]
+                f.write(array.tobytes())
+            header["shards"][language] = {"size": len(shard.ids), "max_idf": max_idf, "arrays": layout}
+
+        raw = json.dumps(header, separators=(",", ":")).encode()
+        header_offset = f.tell()
+        f.write(raw)
+        f.seek(0)
+        f.write(PRELUDE.pack(MAGIC, header_offset, len(raw)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_header(path: str) -> dict | None:
+    """The header of the snapshot at `path`, or None if there is none."""
+    try:
+        with open(path, "rb") as f:
+            magic, offset, length = PRELUDE.unpack(f.read(PRELUDE.size))
+            if magic != MAGIC:
+                return None
+            f.seek(offset)
+            return json.loads(f.read(length))
+    except (FileNotFoundError, struct.error, ValueError):
+        return None
+
+
+class TermTable:
+    """Read-only term → id dictionary over the mapped arrays."""
+
+    __slots__ = ("blob", "offsets", "slots", "mask")
+
+    def __init__(self, blob, offsets: np.ndarray, slots: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+        self.slots = slots
+        self.mask = len(slots) - 1
+
+    def get(self, token: str) -> int | None:
+        raw = token.encode()
+        slot = zlib.crc32(raw) & self.mask
+        while True:
+            term_id = int(self.slots[slot])
+            if term_id < 0:
+                return None
+            if self.blob[int(self.offsets[term_id]):int(self.offsets[term_id + 1])] == raw:
+                return term_id
+            slot = (slot + 1) & self.mask
+
+
+class StringTable:
+    """Read-only list of strings stored as offsets into a UTF-8 blob."""
+
+    __slots__ = ("blob", "offsets")
+
+    def __init__(self, blob, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.blob[int(self.offsets[i]):int(self.offsets[i + 1])]).decode()
+
+
+class MappedShard:
+    """Same interface as `faq_index.Shard`, backed by the mapping."""
+
+    __slots__ = ("ids", "answers", "engine")
+
+    def __init__(self, mapping: mmap.mmap, spec: dict):
+        arrays = {
+            name: np.frombuffer(mapping, dtype=np.dtype(dtype), count=count, offset=offset)
+            for name, (dtype, count, offset) in spec["arrays"].items()
+        }
+        answer_start = spec["arrays"]["answer_blob"][2]
+        term_start = spec["arrays"]["term_blob"][2]
+        self.ids = arrays["ids"]
+        self.answers = StringTable(memoryview(mapping)[answer_start:], arrays["answer_offs"])
+        self.engine = BM25Index.from_arrays(
+            spec["size"],
+            TermTable(memoryview(mapping)[term_start:], arrays["term_offs"], arrays["term_slots"]),
+            arrays["idf"], arrays["indptr"], arrays["indices"], arrays["weights"],
+            spec["max_idf"],
+        )
+
+
+class MappedSnapshot:
+    """One snapshot version, mapped read-only."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self.nbytes = stat.st_size
+        magic, offset, length = PRELUDE.unpack_from(self.mapping, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a FAQ index snapshot")
+        header = json.loads(self.mapping[offset:offset + length])
+        if header["format"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported FAQ snapshot format {header['format']}")
+        self.version = header["version"]
+        self.loaded_at = header["loaded_at"]
+        self.shards = {language: MappedShard(self.mapping, spec) for language, spec in header["shards"].items()}
+
+
+def file_identity(path: str) -> tuple | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class BuildLock:
+    """Cross-process exclusive lock (flock on `<path>.lock`), taken without blocking the loop."""
+
+    def __init__(self, path: str):
+        self.path = f"{path}.lock"
+        self._fd: int | None = None
+
+    async def __aenter__(self):
+        self._fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o644)
+        while True:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return self
+            except BlockingIOError:
+                await asyncio.sleep(0.05)
+
+    async def __aexit__(self, *exc):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+
+# ------------------------------
+# Sidecar builder
+# ------------------------------
+# `python -m services.faq_snapshot --interval 30` rebuilds the snapshot from
+# the `faqs` table every 30 s, for deployments where workers run with
+# FAQ_SNAPSHOT_BUILDER=0 and only map it.
+def main():
+    import argparse
+    from services.faq_index import FAQ_SNAPSHOT_PATH, FAQIndex
+
+    parser = argparse.ArgumentParser(description="Build the shared FAQ index snapshot.")
+    parser.add_argument("--path", default=FAQ_SNAPSHOT_PATH, required=FAQ_SNAPSHOT_PATH is None)
+    parser.add_argument("--interval", type=float, default=0, help="rebuild every N seconds (0: once)")
+    args = parser.parse_args()
+
+    async def run():
+        index = FAQIndex(snapshot_path=args.path, builder=True)
+        while True:
+            await index.rebuild_snapshot()
+            if not args.interval:
+                return
+            await asyncio.sleep(args.interval)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import re
+import unicodedata
+from os import getenv
+from services.retrieval import TOKEN_RE, tokenize
+
+# ------------------------------
+# Language routing and normalization for FAQ matching
+# ------------------------------
+# FAQs are indexed in one shard per language and a query is only ranked
+# against its own language's shard (then the default shard as a fallback),
+# so candidate sets stay small as languages are added.
+#
+# English uses `retrieval.tokenize`. Hindi and Gujarati text is NFKC
+# normalized and, with FAQ_TRANSLITERATE on, native script is romanized
+# (Devanagari and Gujarati share one table: the Gujarati block is the
+# Devanagari block shifted by 0x180). Both sides then go through a loose
+# phonetic key (w→v, ph→f, vowels after the first letter dropped …), so
+# "परीक्षा कब है" and "pariksha kab hai" meet on the same tokens.
+
+DEFAULT_LANGUAGE = getenv("FAQ_DEFAULT_LANGUAGE", "en")
+FAQ_TRANSLITERATE = getenv("FAQ_TRANSLITERATE", "1") not in ("0", "false", "False")
+
+SCRIPT_RANGES = {
+    "hi": (0x0900, 0x097F),  # Devanagari
+    "gu": (0x0A80, 0x0AFF),  # Gujarati
+}
+INDIC_LANGUAGES = frozenset(SCRIPT_RANGES)
+SUPPORTED_LANGUAGES = frozenset({"en", *INDIC_LANGUAGES})
+
+GUJARATI_OFFSET = 0x0180
+
+CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n",
+    "च": "ch", "छ": "chh", "ज": "j", "झ": "jh", "ञ": "n",
+    "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n",
+    "त": "t", "थ": "th", "द": "d", "ध": "dh", "न": "n",
+    "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m",
+    "य": "y", "र": "r", "ल": "l", "ळ": "l", "व": "v",
+    "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+}
+VOWELS = {
+    "अ": "a", "आ": "aa", "इ": "i", "ई": "ii", "उ": "u", "ऊ": "uu", "ऋ": "ri",
+    "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au", "ऑ": "o",
+}
+VOWEL_SIGNS = {
+    "ा": "aa", "ि": "i", "ी": "ii", "ु": "u", "ू": "uu", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au", "ॉ": "o",
+}
+MARKS = {"ं": "n", "ँ": "n", "ः": "h"}
+VIRAMA = "्"
+NUKTA = "़"
+DIGITS = {chr(0x0966 + digit): str(digit) for digit in range(10)}
+
+# Applied in order to romanized tokens on both sides of the match
+PHONETIC_RULES = (("w", "v"), ("ph", "f"), ("z", "j"), ("q", "k"), ("ck", "k"), ("chh", "ch"))
+NON_INITIAL_VOWELS_RE = re.compile("[aeiou]+")
+
+INDIC_STOPWORDS = frozenset("""
+hai hain tha the ka ki ke ko se me mein par aur ya bhi to kya kab kaise kahan kaun
+mujhe mera meri hum ham aap ap
+che chhe nu ni no na ma ane shu kyare kya hu
+""".split())
+
+
+def primary_subtag(language: str | None) -> str | None:
+    """'hi-IN' → 'hi'; None for empty values."""
+    if not language:
+        return None
+    return language.replace("_", "-").split("-", 1)[0].strip().lower() or None
+
+
+def detect_script(text: str | None) -> str:
+    """Language of the dominant Indic script in `text`, else the default."""
+    counts = dict.fromkeys(SCRIPT_RANGES, 0)
+    for char in text or "":
+        code = ord(char)
+        for language, (low, high) in SCRIPT_RANGES.items():
+            if low <= code <= high:
+                counts[language] += 1
+    language, count = max(counts.items(), key=lambda item: item[1])
+    return language if count else DEFAULT_LANGUAGE
+
+
+def resolve_language(detected_language: str | None, text: str | None) -> str:
+    """Shard for a query: its declared language if supported, else its script."""
+    language = primary_subtag(detected_language)
+    if language in SUPPORTED_LANGUAGES:
+        # A client that says "hi" but types in Gujarati script goes to Gujarati
+        script = detect_script(text)
+        return script if script in INDIC_LANGUAGES else language
+    return detect_script(text)
+
+
+def transliterate(text: str) -> str:
+    """Romanizes Devanagari / Gujarati characters; everything else is kept."""
+    out = []
+    pending_a = False  # inherent vowel of the last consonant
+    for char in unicodedata.normalize("NFC", text):
+        code = ord(char)
+        if SCRIPT_RANGES["gu"][0] <= code <= SCRIPT_RANGES["gu"][1]:
+            char = chr(code - GUJARATI_OFFSET)
+
+        if char == NUKTA:
+            continue  # क़ / ज़ / फ़ … read as their base consonant
+        if char in VOWEL_SIGNS:
+            out.append(VOWEL_SIGNS[char])
+            pending_a = False
+            continue
+        if char == VIRAMA:
+            pending_a = False
+            continue
+
+        if pending_a and (char in CONSONANTS or char in MARKS):
+            out.append("a")
+        # Anywhere else (end of word, punctuation) the schwa is silent
+        pending_a = False
+
+        if char in CONSONANTS:
+            out.append(CONSONANTS[char])
+            pending_a = True
+        elif char in VOWELS:
+            out.append(VOWELS[char])
+        elif char in MARKS:
+            out.append(MARKS[char])
+        elif char in DIGITS:
+            out.append(DIGITS[char])
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def phonetic_key(token: str) -> str:
+    """
+    Loose spelling-independent key: romanized Hindi / Gujarati vowels vary
+    by writer (hostel / hostal, bharein / bharen), so only the first letter
+    keeps its vowel and the rest is reduced to consonants.
+    """
+    for old, new in PHONETIC_RULES:
+        token = token.replace(old, new)
+    return token[:1] + NON_INITIAL_VOWELS_RE.sub("", token[1:])
+
+
+INDIC_STOPWORDS_KEYED = frozenset(
+    phonetic_key(word) if FAQ_TRANSLITERATE else word for word in INDIC_STOPWORDS
+)
+
+
+def tokenize_for(language: str, text: str | None) -> list[str]:
+    """Tokens of `text` as indexed in `language`'s shard."""
+    if language not in INDIC_LANGUAGES:
+        return tokenize(text)
+
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    if FAQ_TRANSLITERATE:
+        text = transliterate(text)
+        tokens = (phonetic_key(token) for token in TOKEN_RE.findall(text))
+    else:
+        tokens = TOKEN_RE.findall(text)
+    return [token for token in tokens if token not in INDIC_STOPWORDS_KEYED]
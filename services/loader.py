@@ -0,0 +1,125 @@
+import asyncio
+from os import getenv
+from typing import Hashable
+from database import execute, supabase
+
+# ------------------------------
+# Batched row lookups (DataLoader-style)
+# ------------------------------
+# Lookups of single rows by a unique column ("students" by id, by email…)
+# made in the same event-loop tick are merged into one
+# `select(...).in_(column, [...])` query per (table, column, columns),
+# whichever request they come from, and a key asked for twice is fetched
+# once. Handlers just `await loaders.load(...)`, so independent lookups
+# started together (asyncio.gather, concurrent requests) share a round trip.
+#
+# Coalescing is process-wide but results are only shared by lookups that
+# were in flight together; a `Loaders` instance (one per request, via the
+# `request_loaders` dependency) additionally remembers what it has loaded
+# for the rest of its request.
+
+LOADER_MAX_KEYS = int(getenv("LOADER_MAX_KEYS", "500"))  # keys per IN query
+
+
+class BatchDispatcher:
+    """Collects keys for one (table, key column, columns) and fetches them together."""
+
+    def __init__(self, table: str, key: str, columns: str, max_keys: int = LOADER_MAX_KEYS):
+        self.table = table
+        self.key = key
+        self.columns = columns
+        self.max_keys = max_keys
+        self._pending: dict[Hashable, asyncio.Future] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.loads = 0
+        self.deduplicated = 0
+        self.queries = 0
+
+    def load(self, value: Hashable) -> asyncio.Future:
+        self.loads += 1
+        future = self._pending.get(value)
+        if future is not None:
+            self.deduplicated += 1
+            return future
+
+        loop = asyncio.get_running_loop()
+        if not self._pending:
+            # Two hops: after every callback already queued in this tick, and
+            # after the tasks those callbacks start (a gather inside a gather)
+            loop.call_soon(loop.call_soon, self._dispatch)
+        future = self._pending[value] = loop.create_future()
+        return future
+
+    def _dispatch(self):
+        pending, self._pending = list(self._pending.items()), {}
+        for start in range(0, len(pending), self.max_keys):
+            task = asyncio.ensure_future(self._fetch(pending[start:start + self.max_keys]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, batch: list[tuple[Hashable, asyncio.Future]]):
+        self.queries += 1
+        try:
+            response = await execute(
+                supabase.table(self.table).select(self.columns).in_(self.key, [value for value, _ in batch])
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        rows = {row[self.key]: row for row in response.data or []}
+        for value, future in batch:
+            if not future.done():
+                future.set_result(rows.get(value))
+
+    def stats(self) -> dict:
+        return {
+            "loads": self.loads,
+            "deduplicated": self.deduplicated,
+            "queries": self.queries,
+            "keys_per_query": round((self.loads - self.deduplicated) / self.queries, 2) if self.queries else 0.0,
+        }
+
+
+_dispatchers: dict[tuple[str, str, str], BatchDispatcher] = {}
+
+
+def dispatcher(table: str, key: str = "id", columns: str = "*") -> BatchDispatcher:
+    """Process-wide dispatcher for lookups of `table` rows by `key`."""
+    if columns != "*" and key not in (column.strip() for column in columns.split(",")):
+        columns = f"{columns}, {key}"  # needed to hand each row to its key
+    found = _dispatchers.get((table, key, columns))
+    if found is None:
+        found = _dispatchers[(table, key, columns)] = BatchDispatcher(table, key, columns)
+    return found
+
+
+def loader_stats() -> dict:
+    return {f"{table}.{key} ({columns})": d.stats() for (table, key, columns), d in _dispatchers.items()}
+
+
+class Loaders:
+    """Request-scoped front of the dispatchers: memoizes every lookup it makes."""
+
+    def __init__(self):
+        self._loaded: dict[tuple, asyncio.Future] = {}
+
+    async def load(self, table: str, value: Hashable, key: str = "id", columns: str = "*") -> dict | None:
+        """The `table` row whose `key` equals `value`, or None."""
+        cache_key = (table, key, columns, value)
+        future = self._loaded.get(cache_key)
+        if future is None:
+            future = self._loaded[cache_key] = dispatcher(table, key, columns).load(value)
+        # Shared with other requests: one caller giving up must not cancel it
+        return await asyncio.shield(future)
+
+    async def load_many(self, table: str, values: list[Hashable], key: str = "id", columns: str = "*") -> list[dict | None]:
+        """Rows for `values`, in order (None where missing), in one batched query."""
+        return list(await asyncio.gather(*(self.load(table, value, key, columns) for value in values)))
+
+
+async def request_loaders() -> Loaders:
+    """FastAPI dependency: one `Loaders` per request."""
+    return Loaders()
@@ -0,0 +1,315 @@
+import importlib
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from os import getenv
+from postgrest import APIError, APIResponse
+
+# ------------------------------
+# In-memory PostgREST stand-in
+# ------------------------------
+# With DATABASE_BACKEND=memory, `database.supabase` is a MemoryClient instead
+# of a Supabase client, so the API (and the load benchmarks) run without a
+# Supabase project. It implements the subset of the postgrest query builder
+# this codebase uses:
+#
+#   table(...).select(columns, count="exact") / insert / upsert(on_conflict="id")
+#   / update / delete, filtered with eq / neq / lt / lte / gt / gte / in_ / or_,
+#   then order / limit, and rpc() for the functions in RPC_FUNCTIONS. The
+#   triggers in TRIGGERS run on insert.
+#
+# `execute()` sleeps MEMORY_DB_LATENCY (+ up to MEMORY_DB_JITTER) seconds to
+# stand in for the PostgREST round trip; it is called on a worker thread by
+# `database.execute` like the real client. Builders expose `path`,
+# `http_method` and `headers` like postgrest's, so metrics label them the same.
+
+MEMORY_DB_LATENCY = float(getenv("MEMORY_DB_LATENCY", "0"))
+MEMORY_DB_JITTER = float(getenv("MEMORY_DB_JITTER", "0"))
+
+# Unique columns, enforced on insert like the real schema's constraints
+UNIQUE_COLUMNS = {"students": ("email",), "admins": ("email",)}
+
+# Database functions callable over rpc(): "module:function", called with
+# (tables, next_id, **params) under the client lock
+RPC_FUNCTIONS = {
+    "resolve_unsolved_queries": "services.unsolved:resolve_unsolved_queries_local",
+    "unsolved_query_clusters": "services.unsolved:unsolved_query_clusters_local",
+    "resolve_unsolved_cluster": "services.unsolved:resolve_unsolved_cluster_local",
+    "update_rows": "services.batch:update_rows_local",
+}
+
+# Before-insert triggers: "module:function", called with (tables, row) once
+# the row has its id
+TRIGGERS = {
+    "unsolved_queries": "services.unsolved:unsolved_queries_assign_cluster_local",
+}
+
+
+def _resolve(spec: str):
+    module, _, function = spec.partition(":")
+    return getattr(importlib.import_module(module), function)
+
+
+def _coerce(value, like):
+    """Converts a filter value (often a string, as PostgREST sees it) to the type of `like`."""
+    if isinstance(value, str) and len(value) >= 2 and value[0] == value[-1] == '"':
+        value = value[1:-1]
+    if like is None or value is None or isinstance(value, type(like)):
+        return value
+    if isinstance(like, bool):
+        return str(value).lower() == "true"
+    if isinstance(like, (int, float)):
+        try:
+            return type(like)(value)
+        except ValueError:
+            return float(value)
+    return str(value)
+
+
+def _compare(op: str, actual, expected) -> bool:
+    if op == "is":
+        if str(expected).lower() == "null":
+            return actual is None
+        return actual is _coerce(expected, True)
+    if op == "in":
+        return any(actual == _coerce(value, actual) for value in expected)
+    if actual is None:
+        return op == "neq" and expected is not None
+    expected = _coerce(expected, actual)
+    if op == "eq":
+        return actual == expected
+    if op == "neq":
+        return actual != expected
+    if op == "lt":
+        return actual < expected
+    if op == "lte":
+        return actual <= expected
+    if op == "gt":
+        return actual > expected
+    if op == "gte":
+        return actual >= expected
+    raise ValueError(f"Unsupported operator: {op}")
+
+
+def _split_top_level(text: str) -> list[str]:
+    """Splits on commas outside parentheses and double quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _parse_logic(expression: str):
+    """PostgREST logic tree ("a.lt.1,and(b.eq.2,c.gt.3)") → nested predicate."""
+    if expression.startswith(("and(", "or(")) and expression.endswith(")"):
+        name, _, inner = expression.partition("(")
+        children = [_parse_logic(part) for part in _split_top_level(inner[:-1])]
+        combine = all if name == "and" else any
+        return lambda row: combine(child(row) for child in children)
+    column, op, value = expression.split(".", 2)
+    return lambda row: _compare(op, row.get(column), value)
+
+
+class MemoryQuery:
+    def __init__(self, client: "MemoryClient", table: str, rpc: dict | None = None):
+        self.client = client
+        self.table = table
+        self.path = f"/rpc/{table}" if rpc is not None else f"/{table}"
+        self.http_method = "POST" if rpc is not None else "GET"
+        self.headers: dict[str, str] = {}
+        self.json = rpc
+        self.columns: list[str] | None = None
+        self.count = None
+        self.filters: list = []
+        self.orders: list[tuple[str, bool]] = []
+        self.row_limit: int | None = None
+        self.on_conflict: str | None = None
+
+    # --- Statements ---
+
+    def select(self, *columns: str, count: str | None = None):
+        names = [name.strip() for column in columns for name in column.split(",") if name.strip()]
+        self.columns = None if not names or "*" in names else names
+        self.count = count
+        if count:
+            self.headers["prefer"] = f"count={count}"
+        return self
+
+    def insert(self, rows):
+        self.http_method, self.json = "POST", rows
+        return self
+
+    def upsert(self, rows, on_conflict: str = "id"):
+        self.http_method, self.json, self.on_conflict = "POST", rows, on_conflict
+        self.headers["prefer"] = "resolution=merge-duplicates"
+        return self
+
+    def update(self, values: dict):
+        self.http_method, self.json = "PATCH", values
+        return self
+
+    def delete(self):
+        self.http_method = "DELETE"
+        return self
+
+    # --- Filters and modifiers ---
+
+    def _filter(self, op: str, column: str, value):
+        self.filters.append(lambda row: _compare(op, row.get(column), value))
+        return self
+
+    def eq(self, column, value): return self._filter("eq", column, value)
+    def neq(self, column, value): return self._filter("neq", column, value)
+    def lt(self, column, value): return self._filter("lt", column, value)
+    def lte(self, column, value): return self._filter("lte", column, value)
+    def gt(self, column, value): return self._filter("gt", column, value)
+    def gte(self, column, value): return self._filter("gte", column, value)
+    def in_(self, column, values): return self._filter("in", column, list(values))
+
+    def or_(self, filters: str):
+        self.filters.append(_parse_logic(f"or({filters})"))
+        return self
+
+    def order(self, column: str, desc: bool = False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, size: int):
+        self.row_limit = size
+        return self
+
+    def execute(self) -> APIResponse:
+        self.client.wait()
+        with self.client.lock:
+            return self.client.run(self)
+
+
+class MemoryClient:
+    """Thread-safe in-memory tables behind a postgrest-shaped query builder."""
+
+    def __init__(self, latency: float = MEMORY_DB_LATENCY, jitter: float = MEMORY_DB_JITTER):
+        self.latency = latency
+        self.jitter = jitter
+        self.lock = threading.RLock()
+        self.tables: dict[str, list[dict]] = {}
+        self._ids: dict[str, int] = {}
+        self.calls = 0
+
+    def table(self, name: str) -> MemoryQuery:
+        return MemoryQuery(self, name)
+
+    def rpc(self, name: str, params: dict | None = None) -> MemoryQuery:
+        return MemoryQuery(self, name, rpc=params or {})
+
+    def seed(self, tables: dict[str, list[dict]]):
+        """Replaces the given tables' rows (ids are kept; missing ones are assigned)."""
+        with self.lock:
+            for name, rows in tables.items():
+                self.tables[name] = []
+                self._ids[name] = 0
+                self._insert(name, rows)
+
+    def next_id(self, table: str) -> int:
+        self._ids[table] = self._ids.get(table, 0) + 1
+        return self._ids[table]
+
+    def wait(self):
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    # --- Execution (called with the lock held) ---
+
+    def run(self, query: MemoryQuery) -> APIResponse:
+        self.calls += 1
+        if query.path.startswith("/rpc/"):
+            return APIResponse(data=self._rpc(query.table, query.json), count=None)
+
+        if query.http_method == "POST":
+            rows = query.json if isinstance(query.json, list) else [query.json]
+            if query.on_conflict:
+                return APIResponse(data=self._upsert(query.table, rows, query.on_conflict), count=None)
+            return APIResponse(data=self._insert(query.table, rows), count=None)
+
+        matched = [row for row in self.tables.setdefault(query.table, []) if all(f(row) for f in query.filters)]
+
+        if query.http_method == "PATCH":
+            for row in matched:
+                row.update(query.json)
+            return APIResponse(data=[dict(row) for row in matched], count=None)
+
+        if query.http_method == "DELETE":
+            ids = {id(row) for row in matched}
+            self.tables[query.table] = [row for row in self.tables[query.table] if id(row) not in ids]
+            return APIResponse(data=[dict(row) for row in matched], count=None)
+
+        total = len(matched)
+        for column, desc in reversed(query.orders):
+            # NULLS LAST ascending, NULLS FIRST descending, as in Postgres
+            matched.sort(key=lambda row: (row.get(column) is None, 0 if row.get(column) is None else row.get(column)), reverse=desc)
+        if query.row_limit is not None:
+            matched = matched[:query.row_limit]
+        if query.columns is not None:
+            data = [{column: row.get(column) for column in query.columns} for row in matched]
+        else:
+            data = [dict(row) for row in matched]
+        return APIResponse(data=data, count=total if query.count else None)
+
+    def _insert(self, table: str, rows: list[dict]) -> list[dict]:
+        stored = self.tables.setdefault(table, [])
+        for column in UNIQUE_COLUMNS.get(table, ()):
+            taken = {row.get(column) for row in stored}
+            for row in rows:
+                if row.get(column) in taken:
+                    raise APIError({
+                        "code": "23505",
+                        "message": f'duplicate key value violates unique constraint "{table}_{column}_key"',
+                    })
+                taken.add(row.get(column))
+
+        trigger = _resolve(TRIGGERS[table]) if table in TRIGGERS else None
+        inserted = []
+        for row in rows:
+            row = dict(row)
+            if row.get("id") is None:
+                row["id"] = self.next_id(table)
+            elif isinstance(row["id"], int):
+                self._ids[table] = max(self._ids.get(table, 0), row["id"])
+            row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+            if trigger is not None:
+                trigger(self.tables, row)
+            stored.append(row)
+            inserted.append(dict(row))
+        return inserted
+
+    def _upsert(self, table: str, rows: list[dict], on_conflict: str) -> list[dict]:
+        existing = {row.get(on_conflict): row for row in self.tables.setdefault(table, [])}
+        result, new_rows = [], []
+        for row in rows:
+            current = existing.get(row.get(on_conflict))
+            if current is None:
+                new_rows.append(row)
+            else:
+                current.update(row)
+                result.append(dict(current))
+        return result + self._insert(table, new_rows)
+
+    def _rpc(self, name: str, params: dict):
+        if name not in RPC_FUNCTIONS:
+            raise APIError({"code": "PGRST202", "message": f"Could not find the function public.{name}"})
+        fn = _resolve(RPC_FUNCTIONS[name])
+        for table in ("faqs", "chat_logs", "unsolved_queries"):
+            self.tables.setdefault(table, [])
+        return fn(self.tables, self.next_id, **params)
@@ -0,0 +1,207 @@
+import time
+from bisect import bisect_left
+from starlette.routing import Match
+
+# ------------------------------
+# Prometheus metrics
+# ------------------------------
+# Minimal in-process collectors rendered in the Prometheus text format at
+# GET /metrics. Metrics are only updated from the event loop (the request
+# middleware and `database.execute` after its await), so there are no locks
+# on the hot path: an observation is one bisect and a few additions.
+#
+# - http_request_duration_seconds{method, route, status}: latency by route
+#   template, so ids in the path do not create new series; methods outside
+#   the standard HTTP verbs are counted as "other", like unmatched routes
+# - http_requests_in_flight{method, route}: requests (and open SSE streams)
+#   currently being served
+# - supabase_call_duration_seconds{table, operation}: round trip of one
+#   `database.execute`, operation being select / count / insert / upsert /
+#   update / delete / rpc
+# - supabase_pool_wait_seconds{table, operation}: time spent waiting for a
+#   worker thread (SUPABASE_MAX_CONCURRENCY) before the call started
+# - supabase_call_errors_total{table, operation}
+#
+# Metrics are per worker process; Prometheus sums them across targets.
+
+HTTP_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "CONNECT", "TRACE"))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.name, _labels(self.labelnames, labels), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self):
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", _labels(self.labelnames, labels, f'le="{bound}"'), cumulative
+            yield f"{self.name}_sum", _labels(self.labelnames, labels), total
+            yield f"{self.name}_count", _labels(self.labelnames, labels), count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency.", ("method", "route", "status"),
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served.", ("method", "route"),
+))
+supabase_call_duration = registry.register(Histogram(
+    "supabase_call_duration_seconds", "Supabase call latency.", ("table", "operation"),
+))
+supabase_pool_wait = registry.register(Histogram(
+    "supabase_pool_wait_seconds", "Wait for a Supabase worker thread.", ("table", "operation"),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+))
+supabase_call_errors = registry.register(Counter(
+    "supabase_call_errors_total", "Failed Supabase calls.", ("table", "operation"),
+))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def describe_query(query) -> tuple[str, str]:
+    """(table, operation) of a postgrest request builder."""
+    path = getattr(query, "path", "") or ""
+    method = getattr(query, "http_method", "GET")
+    if path.startswith("/rpc/"):
+        return path[len("/rpc/"):], "rpc"
+    table = path.lstrip("/") or "unknown"
+    prefer = (getattr(query, "headers", None) or {}).get("prefer") or ""
+    if method in ("GET", "HEAD"):
+        return table, "count" if "count=" in prefer else "select"
+    if method == "POST":
+        return table, "upsert" if "resolution=" in prefer else "insert"
+    if method == "PATCH":
+        return table, "update"
+    if method == "DELETE":
+        return table, "delete"
+    return table, method.lower()
+
+
+def _route_prefixes(app) -> list[tuple[str, object]]:
+    """(static path prefix, route) pairs, built once per app."""
+    prefixes = getattr(app.state, "metrics_route_prefixes", None)
+    if prefixes is None:
+        prefixes = [(getattr(route, "path", "").split("{", 1)[0], route) for route in app.router.routes]
+        app.state.metrics_route_prefixes = prefixes
+    return prefixes
+
+
+def route_template(app, scope) -> str:
+    """Path template of the route that will serve `scope`, e.g. "/admin/faqs/{faq_id}"."""
+    path = scope["path"]
+    partial = None
+    # Only routes whose static prefix fits get the (regex) match
+    for prefix, route in _route_prefixes(app):
+        if not path.startswith(prefix):
+            continue
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", path)
+        if match == Match.PARTIAL and partial is None:
+            partial = getattr(route, "path", None)
+    return partial or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and in-flight gauges per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in HTTP_METHODS else "other"
+        route = route_template(scope["app"], scope)
+        status = 500  # unless a response starts
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        http_requests_in_flight.inc(method, route)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec(method, route)
+            http_request_duration.observe(time.perf_counter() - started, method, route, str(status))
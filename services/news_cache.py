@@ -0,0 +1,29 @@
+from os import getenv
+from database import execute, supabase
+from services.cache import CachedValue
+
+# ------------------------------
+# News snapshot cache
+# ------------------------------
+# News changes a few times a day but is read on every home screen and news
+# feed. The whole table is kept in memory as one newest-first snapshot;
+# `add_news` / `update_news` / `delete_news` invalidate it. Other workers
+# pick up changes within NEWS_CACHE_TTL seconds.
+
+NEWS_CACHE_TTL = float(getenv("NEWS_CACHE_TTL", "60"))
+NEWS_CACHE_STALE_TTL = float(getenv("NEWS_CACHE_STALE_TTL", "600"))
+
+
+async def load_news() -> list[dict]:
+    response = await execute(
+        supabase.table("news").select("*").order("created_at", desc=True).order("id", desc=True)
+    )
+    return response.data or []
+
+
+news_snapshot = CachedValue(load_news, ttl=NEWS_CACHE_TTL, stale_ttl=NEWS_CACHE_STALE_TTL)
+
+
+def project(rows: list[dict], columns: tuple[str, ...]) -> list[dict]:
+    """Returns copies of `rows` holding only `columns` (as a narrower select would)."""
+    return [{column: row.get(column) for column in columns} for row in rows]
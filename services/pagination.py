@@ -0,0 +1,142 @@
+import json
+from datetime import datetime
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from dataclasses import dataclass
+from fastapi import HTTPException, Query
+
+# ------------------------------
+# Keyset (cursor) pagination
+# ------------------------------
+# List endpoints return one page at a time, newest first. The cursor is an
+# opaque token holding the sort key of the last row served; the next page is
+# fetched with a `WHERE key < cursor` filter, so its cost does not depend on
+# how deep into the list the client is (unlike OFFSET).
+#
+# Cursors come from clients, so they are checked against the list's sort key
+# (integer ids, ISO timestamps) before use: a malformed or foreign cursor is
+# a 400, and nothing but a re-serialized int / timestamp reaches a filter.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+CREATED_AT_KEY = ("created_at", "id")
+ID_KEY = ("id",)
+
+
+@dataclass
+class PageParams:
+    after: list | None  # decoded cursor: sort key of the last row already served
+    limit: int
+    legacy: bool
+
+
+def encode_cursor(row: dict, key: tuple[str, ...]) -> str:
+    raw = json.dumps([row[column] for column in key], separators=(",", ":"))
+    return urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key: tuple[str, ...] = CREATED_AT_KEY) -> list:
+    """The sort key values in `cursor`, validated against `key`; 400 if invalid."""
+    try:
+        values = json.loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != len(key):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    checked = []
+    for column, value in zip(key, values):
+        if column == "id":
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            checked.append(value)
+            continue
+        try:
+            checked.append(datetime.fromisoformat(value).isoformat())
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return checked
+
+
+def page_params_for(key: tuple[str, ...]):
+    """Builds the query parameter dependency of lists sorted by `key`."""
+
+    def page_params(
+        cursor: str | None = Query(None, description="`next_cursor` from the previous page"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        legacy: bool = Query(False, description="Return the full, unpaged list (deprecated)"),
+    ) -> PageParams:
+        """Common query parameters of paginated list endpoints."""
+        return PageParams(after=decode_cursor(cursor, key) if cursor else None, limit=limit, legacy=legacy)
+
+    return page_params
+
+
+# Lists sorted by (created_at, id) and by id
+page_params = page_params_for(CREATED_AT_KEY)
+id_page_params = page_params_for(ID_KEY)
+
+
+def paginate(query, params: PageParams, key: tuple[str, ...] = CREATED_AT_KEY):
+    """
+    Orders `query` newest first by `key`, applies the cursor and fetches one
+    row more than the page size (to know whether a next page exists).
+    With `legacy` set, only the ordering is applied.
+    """
+    if params.after and not params.legacy:
+        if len(params.after) != len(key):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if key == ID_KEY:
+            query = query.lt("id", params.after[0])
+        else:
+            column, tiebreak = key
+            value, last_id = params.after
+            # Quoted so PostgREST does not parse ':' / '+' in timestamps
+            query = query.or_(
+                f'{column}.lt."{value}",and({column}.eq."{value}",{tiebreak}.lt.{int(last_id)})'
+            )
+
+    for column in key:
+        query = query.order(column, desc=True)
+
+    if params.legacy:
+        return query
+    return query.limit(params.limit + 1)
+
+
+def _sort_value(value):
+    # Timestamps come back from PostgREST with a variable number of fractional
+    # digits, so compare them as datetimes rather than strings
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return value
+
+
+def paginate_rows(rows: list[dict], params: PageParams, key: tuple[str, ...] = CREATED_AT_KEY) -> list[dict]:
+    """
+    In-memory counterpart of `paginate` for rows already sorted newest first
+    by `key` (e.g. a cached snapshot). Pass the result to `build_page`.
+    """
+    if params.legacy:
+        return rows
+    if params.after:
+        if len(params.after) != len(key):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = tuple(_sort_value(value) for value in params.after)
+        start = 0
+        while start < len(rows) and tuple(_sort_value(rows[start][column]) for column in key) >= after:
+            start += 1
+        rows = rows[start:]
+    return rows[:params.limit + 1]
+
+
+def build_page(rows: list[dict], params: PageParams, key: tuple[str, ...] = CREATED_AT_KEY):
+    """Turns the rows fetched by `paginate` into the response body."""
+    if params.legacy:
+        return rows
+    items = rows[:params.limit]
+    next_cursor = encode_cursor(items[-1], key) if len(rows) > params.limit else None
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,76 @@
+import re
+
+# ------------------------------
+# PDF text extraction and Q/A segmentation
+# ------------------------------
+# These functions run inside the PDF import process pool, so this module only
+# imports what the workers need (no database client, no FastAPI).
+
+QUESTION_RE = re.compile(r"^\s*Q(?:uestion)?\s*\d*\s*[:.)\-]\s*(?P<text>.+)$", re.IGNORECASE)
+NUMBERING_RE = re.compile(r"^\s*\d{1,3}\s*[.)]\s*")
+ANSWER_RE = re.compile(r"^\s*A(?:ns(?:wer)?)?\s*\d*\s*[:.)\-]\s*(?P<text>.*)$", re.IGNORECASE)
+
+
+def page_count(path: str) -> int:
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as document:
+        return document.page_count
+
+
+def extract_pages(path: str, start: int, stop: int) -> list[str]:
+    """Returns the plain text of pages [start, stop)."""
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as document:
+        return [document.load_page(number).get_text("text") for number in range(start, stop)]
+
+
+def segment_qa(text: str) -> list[tuple[str, str]]:
+    """
+    Splits extracted text into (question, answer) pairs.
+    A question is a line marked "Q:", "Q3.", "Question 3)" etc., or any line
+    ending with "?" (list numbering such as "3." is stripped). Everything up
+    to the next question is its answer; an "A:" / "Ans." prefix on the first
+    answer line is dropped.
+    """
+    pairs = []
+    question = None
+    answer_lines: list[str] = []
+
+    def close():
+        answer = " ".join(answer_lines).strip()
+        if question and answer:
+            pairs.append((question, answer))
+
+    for raw_line in text.splitlines():
+        line = " ".join(raw_line.split())
+        if not line:
+            continue
+
+        marked = QUESTION_RE.match(line)
+        if (
+            question
+            and not answer_lines
+            and not question.endswith("?")
+            and not marked
+            and line[0].islower()
+        ):
+            # A question wrapped over several lines
+            question = f"{question} {line}"
+            continue
+
+        if marked or line.endswith("?"):
+            close()
+            question = marked.group("text") if marked else NUMBERING_RE.sub("", line)
+            answer_lines = []
+            continue
+
+        if question is None:
+            continue  # preamble before the first question
+
+        answer = ANSWER_RE.match(line) if not answer_lines else None
+        answer_lines.append(answer.group("text") if answer else line)
+
+    close()
+    return pairs
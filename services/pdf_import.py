@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import uuid
+from typing import Awaitable, Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from os import getenv
+from database import execute, supabase
+from services import pdf_extract
+
+# ------------------------------
+# Background PDF → FAQ import
+# ------------------------------
+# `POST /admin/faqs` with a PDF only spools the upload to disk and returns a
+# job id. Text extraction and Q/A segmentation are CPU-bound, so they run in
+# a process pool (a few pages per task, so progress can be reported per page)
+# and never block the event loop. The extracted FAQs are bulk inserted.
+#
+# Job status is kept in the `faq_import_jobs` table
+# (migrations/005_faq_import_jobs.sql), written when the job starts, after
+# each chunk of pages and when it finishes, so any worker can answer
+# `GET /admin/faqs/imports/{id}`, not only the one that took the upload.
+
+logger = logging.getLogger(__name__)
+
+PDF_IMPORT_WORKERS = int(getenv("PDF_IMPORT_WORKERS", "2"))
+PAGES_PER_TASK = 8
+INSERT_BATCH_SIZE = 500
+
+
+@dataclass
+class ImportJob:
+    id: str
+    filename: str
+    created_by: int
+    status: str = "queued"  # queued | extracting | inserting | completed | failed
+    total_pages: int | None = None
+    pages_done: int = 0
+    faqs_found: int = 0
+    faqs_inserted: int = 0
+    error: str | None = None
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    finished_at: str | None = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+_pool: ProcessPoolExecutor | None = None
+_tasks: set[asyncio.Task] = set()
+# Serializes each running job's status writes, so the last one is the newest
+_save_locks: dict[str, asyncio.Lock] = {}
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # "spawn" keeps workers independent of the server's threads and state
+        _pool = ProcessPoolExecutor(
+            max_workers=PDF_IMPORT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def get_job(job_id: str) -> dict | None:
+    """Status of an import job, whichever worker runs it."""
+    response = await execute(supabase.table("faq_import_jobs").select("*").eq("id", job_id))
+    return response.data[0] if response.data else None
+
+
+async def _save(job: ImportJob):
+    # Progress is informational: a failed write must not fail the import
+    async with _save_locks.setdefault(job.id, asyncio.Lock()):
+        try:
+            await execute(supabase.table("faq_import_jobs").update(job.to_dict()).eq("id", job.id))
+        except Exception:
+            logger.exception("Could not save the status of import job %s", job.id)
+
+
+async def start_import(
+    path: str,
+    filename: str,
+    created_by: int,
+    on_inserted: Callable[[list[dict]], Awaitable[None]] | None = None,
+) -> ImportJob:
+    """
+    Registers a job for the PDF at `path` and starts it in the background.
+    `on_inserted` is awaited with the inserted FAQ rows once they are stored.
+    """
+    job = ImportJob(id=uuid.uuid4().hex, filename=filename, created_by=created_by)
+    try:
+        await execute(supabase.table("faq_import_jobs").insert(job.to_dict()))
+    except Exception:
+        os.remove(path)
+        raise
+
+    task = asyncio.create_task(_run(job, path, on_inserted))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
+
+
+async def _run(job: ImportJob, path: str, on_inserted):
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    try:
+        job.status = "extracting"
+        job.total_pages = await loop.run_in_executor(pool, pdf_extract.page_count, path)
+        await _save(job)
+
+        # Extract a few pages per task; progress advances as each chunk lands
+        async def extract(start: int, stop: int) -> list[str]:
+            texts = await loop.run_in_executor(pool, pdf_extract.extract_pages, path, start, stop)
+            job.pages_done += len(texts)
+            await _save(job)
+            return texts
+
+        chunks = await asyncio.gather(*(
+            extract(start, min(start + PAGES_PER_TASK, job.total_pages))
+            for start in range(0, job.total_pages, PAGES_PER_TASK)
+        ))
+        text = "\n".join(page for texts in chunks for page in texts)
+
+        pairs = await loop.run_in_executor(pool, pdf_extract.segment_qa, text)
+        job.faqs_found = len(pairs)
+
+        job.status = "inserting"
+        await _save(job)
+        now = datetime.now(timezone.utc).isoformat()
+        rows = [
+            {
+                "question": question,
+                "answer": answer,
+                "source_type": "pdf",
+                "source_file": job.filename,
+                "created_by": job.created_by,
+                "status": "pending",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for question, answer in pairs
+        ]
+        inserted = []
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            response = await execute(supabase.table("faqs").insert(rows[start:start + INSERT_BATCH_SIZE]))
+            inserted.extend(response.data or [])
+            job.faqs_inserted = len(inserted)
+            await _save(job)
+
+        if on_inserted and inserted:
+            await on_inserted(inserted)
+        job.status = "completed"
+
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+
+    finally:
+        job.finished_at = datetime.now(timezone.utc).isoformat()
+        await _save(job)
+        _save_locks.pop(job.id, None)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,147 @@
+import re
+import unicodedata
+from itertools import chain
+from math import log
+import numpy as np
+from scipy.sparse import csc_matrix
+
+# ------------------------------
+# BM25 retrieval engine
+# ------------------------------
+# FAQ questions are tokenized into a sparse term-document matrix holding
+# precomputed BM25 weights. A query is scored against every document in one
+# vectorized pass: the posting columns of its terms are gathered and summed
+# with `np.bincount`, then the top-k are picked with `np.argpartition`.
+
+# \w alone splits Indic words at every vowel sign and virama (category M),
+# so the combining marks of the Indic blocks (minus the danda punctuation)
+# and ZWNJ / ZWJ count as word characters too
+TOKEN_RE = re.compile(r"[\w\u0900-\u0963\u0966-\u0DFF\u200C\u200D]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be by can could do does did for from get has have how i
+if in is it me my of on or our please should so tell that the their there
+this to was we what when where which who why will with would you your
+""".split())
+
+
+def tokenize(text: str | None) -> list[str]:
+    """NFKC-normalized, lower-case word tokens with stopwords and plural 's' removed."""
+    tokens = []
+    for token in TOKEN_RE.findall(unicodedata.normalize("NFKC", text or "").casefold()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """Immutable BM25 index over a list of pre-tokenized documents."""
+
+    def __init__(self, docs: list[list[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(docs)
+
+        # Flatten once and let dict/map do the per-token work in C
+        flat = list(chain.from_iterable(docs))
+        vocabulary = {token: term_id for term_id, token in enumerate(dict.fromkeys(flat))}
+        self.vocabulary = vocabulary
+
+        lengths = np.fromiter(map(len, docs), dtype=np.int32, count=self.size)
+        rows = np.repeat(np.arange(self.size, dtype=np.int32), lengths)
+        cols = np.fromiter(map(vocabulary.__getitem__, flat), dtype=np.int32, count=len(flat))
+        ones = np.ones(len(rows), dtype=np.float32)
+        # Duplicate (doc, term) pairs are summed into term frequencies
+        tf = csc_matrix((ones, (rows, cols)), shape=(self.size, len(vocabulary)))
+        tf.sum_duplicates()
+
+        doc_len = lengths.astype(np.float32)
+        avg_len = doc_len.mean() if self.size else 0.0
+        doc_freq = np.diff(tf.indptr)
+        self.max_idf = log(1 + (self.size + 0.5) / 0.5)
+        self.idf = np.log1p((self.size - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+        # Precompute the full BM25 weight of every (doc, term) cell
+        norm = k1 * (1 - b + b * doc_len / avg_len) if avg_len else np.full(self.size, k1)
+        freqs = tf.data
+        weights = freqs * (k1 + 1) / (freqs + norm[tf.indices])
+        weights *= np.repeat(self.idf, doc_freq)
+
+        self.indptr = tf.indptr
+        self.indices = tf.indices
+        self.weights = weights.astype(np.float32)
+
+    @classmethod
+    def from_arrays(cls, size: int, vocabulary, idf, indptr, indices, weights, max_idf: float) -> "BM25Index":
+        """
+        An index over prebuilt arrays (e.g. memory-mapped from a snapshot).
+        `vocabulary` only needs a `get(token) -> term id | None` method.
+        """
+        index = cls.__new__(cls)
+        index.size = size
+        index.vocabulary = vocabulary
+        index.idf = idf
+        index.max_idf = max_idf
+        index.indptr = indptr
+        index.indices = indices
+        index.weights = weights
+        return index
+
+    def search(self, query: str | list[str], k: int = 5) -> list[tuple[int, float]]:
+        """
+        Returns up to `k` (document number, confidence) pairs ranked by BM25.
+        Confidence is the share of the query's idf mass that the document
+        covers: 1.0 means every query term occurs in the FAQ question.
+        """
+        tokens = tokenize(query) if isinstance(query, str) else query
+        if not tokens or not self.size:
+            return []
+
+        term_ids = []
+        total_idf = 0.0
+        for token in dict.fromkeys(tokens):
+            term_id = self.vocabulary.get(token)
+            if term_id is None:
+                # Unknown words count against the match with the highest idf
+                total_idf += self.max_idf
+            else:
+                term_ids.append(term_id)
+                total_idf += float(self.idf[term_id])
+        if not term_ids:
+            return []
+
+        slices = [slice(self.indptr[t], self.indptr[t + 1]) for t in term_ids]
+        docs = np.concatenate([self.indices[s] for s in slices])
+        weights = np.concatenate([self.weights[s] for s in slices])
+
+        if len(docs) * 8 < self.size:
+            # Few candidates: rank only the documents sharing a query term
+            candidates, positions = np.unique(docs, return_inverse=True)
+            scores = np.bincount(positions, weights=weights)
+        else:
+            # Common terms: a dense pass is cheaper than sorting the postings
+            candidates = None
+            scores = np.bincount(docs, weights=weights, minlength=self.size)
+
+        k = min(k, len(scores))
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(scores[top])[::-1]]
+        top = top[scores[top] > 0]
+        top_docs = top if candidates is None else candidates[top]
+
+        # Coverage is only needed for the k winners: look each one up in the
+        # (sorted) posting list of every query term
+        covered = np.zeros(len(top_docs))
+        for term_id, s in zip(term_ids, slices):
+            postings = self.indices[s]
+            found = np.searchsorted(postings, top_docs)
+            hit = postings[np.minimum(found, len(postings) - 1)] == top_docs
+            covered += hit * float(self.idf[term_id])
+
+        return [
+            (int(doc_no), min(float(share) / total_idf, 1.0))
+            for doc_no, share in zip(top_docs, covered)
+        ]
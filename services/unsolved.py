@@ -0,0 +1,219 @@
+from datetime import datetime, timezone
+from os import getenv
+from typing import Callable
+from database import execute, supabase
+from services.conditional import VersionCounter
+
+# ------------------------------
+# Unsolved query resolution
+# ------------------------------
+# Resolving a query used to take up to six sequential, non-atomic Supabase
+# calls. It now runs server side in the `resolve_unsolved_queries` Postgres
+# function (migrations/001_…, 002_resolve_unsolved_queries*.sql and
+# 007_unsolved_query_chat_log.sql): one RPC round trip and one transaction
+# per batch, whatever its size. Each query answers the chat log it is linked
+# to by `chat_log_id`. Clusters of near-duplicate queries are stored on the
+# rows and listed / resolved by the functions of
+# migrations/003_unsolved_query_clusters.sql.
+#
+# GET /admin/unsolved tags its pages with `unsolved_version`, bumped when
+# this worker flushes new queries or resolves some; changes made through
+# other workers show up within UNSOLVED_VERSION_TTL seconds.
+#
+# The `*_local` functions are line-for-line Python versions of those SQL
+# functions (and of the cluster trigger) over in-memory tables, for running
+# the API without Supabase.
+
+RESOLVE_RPC = "resolve_unsolved_queries"
+CLUSTERS_RPC = "unsolved_query_clusters"
+RESOLVE_CLUSTER_RPC = "resolve_unsolved_cluster"
+DEFAULT_ANSWER = "Answer added by admin"
+UNSOLVED_VERSION_TTL = float(getenv("UNSOLVED_VERSION_TTL", "10"))
+
+unsolved_version = VersionCounter(ttl=UNSOLVED_VERSION_TTL)
+
+
+async def resolve_queries(items: list[dict], admin_id: int | None = None) -> list[dict]:
+    """
+    Resolves `items` ({"id", "reviewed", "solved", "answer", and optionally
+    "faq_id" / "question"}) in one transaction. Returns one result per item,
+    in order.
+    """
+    response = await execute(supabase.rpc(RESOLVE_RPC, {"items": items, "p_admin_id": admin_id}))
+    return response.data or []
+
+
+async def list_clusters(limit: int = 50, min_count: int = 1) -> list[dict]:
+    """Open clusters with at least `min_count` queries, largest first."""
+    response = await execute(supabase.rpc(CLUSTERS_RPC, {"p_limit": limit, "p_min_count": min_count}))
+    return response.data or []
+
+
+async def resolve_cluster(cluster_id: int, answer: str, question: str | None = None, admin_id: int | None = None) -> list[dict]:
+    """
+    Adds one FAQ for the cluster and answers every open member with it, in
+    one transaction. Returns one result per member (none if the cluster has
+    no open query).
+    """
+    response = await execute(supabase.rpc(RESOLVE_CLUSTER_RPC, {
+        "p_cluster_id": cluster_id, "p_answer": answer, "p_question": question, "p_admin_id": admin_id,
+    }))
+    return response.data or []
+
+
+def resolve_unsolved_queries_local(
+    tables: dict[str, list[dict]],
+    next_id: Callable[[str], int],
+    items: list[dict],
+    p_admin_id: int | None = None,
+) -> list[dict]:
+    """In-memory stand-in for the `resolve_unsolved_queries` SQL function."""
+    results = []
+    for item in items:
+        query = next((row for row in tables["unsolved_queries"] if row["id"] == item["id"]), None)
+        if query is None:
+            results.append({"id": item["id"], "status": "not_found"})
+            continue
+
+        if not item.get("solved"):
+            query["reviewed"] = item.get("reviewed", True) is not False
+            results.append({"id": query["id"], "status": "reviewed"})
+            continue
+
+        now = datetime.now(timezone.utc).isoformat()
+        if item.get("faq_id") is not None:
+            faq = next((row for row in tables["faqs"] if row["id"] == item["faq_id"]), None)
+            if faq is None:
+                results.append({"id": query["id"], "status": "not_found"})
+                continue
+            answer = item.get("answer") or faq["answer"]
+        else:
+            answer = item.get("answer") or DEFAULT_ANSWER
+            faq = {
+                "id": next_id("faqs"),
+                "question": item.get("question") or query["query_text"],
+                "answer": answer,
+                "source_type": "text",
+                "source_file": None,
+                "created_by": p_admin_id or 1,
+                "created_at": now,
+                "updated_at": now,
+                "status": "solved",
+            }
+            tables["faqs"].append(faq)
+
+        chat_ids = []
+        linked = {row.get("chat_log_id") for row in tables["unsolved_queries"]}
+        for log in tables["chat_logs"]:
+            if log.get("status") != "unsolved":
+                continue
+            if query.get("chat_log_id") is not None:
+                matches = log["id"] == query["chat_log_id"]
+            else:
+                # Legacy rows: the student's unlinked logs with the same text
+                matches = (
+                    log["student_id"] == query["student_id"]
+                    and log["query_text"].strip() == query["query_text"].strip()
+                    and log["id"] not in linked
+                )
+            if matches:
+                log.update(bot_response=answer, status="solved", faq_id=faq["id"], updated_at=now)
+                chat_ids.append(log["id"])
+
+        if not chat_ids:
+            log = {
+                "id": next_id("chat_logs"),
+                "student_id": query["student_id"],
+                "query_text": query["query_text"].strip(),
+                "bot_response": answer,
+                "faq_id": faq["id"],
+                "status": "solved",
+                "created_at": now,
+            }
+            tables["chat_logs"].append(log)
+            chat_ids.append(log["id"])
+
+        tables["unsolved_queries"].remove(query)
+
+        results.append({
+            "id": query["id"],
+            "status": "solved",
+            "student_id": query["student_id"],
+            "query_text": query["query_text"],
+            "answer": answer,
+            "faq": faq,
+            "chat_log_ids": chat_ids,
+        })
+    return results
+
+
+def unsolved_queries_assign_cluster_local(tables: dict[str, list[dict]], row: dict):
+    """In-memory stand-in for the `unsolved_queries_assign_cluster` insert trigger."""
+    if row.get("cluster_id") is None and row.get("fingerprint") is not None:
+        row["cluster_id"] = next((
+            other["cluster_id"]
+            for other in sorted(tables["unsolved_queries"], key=lambda other: other["id"])
+            if other.get("fingerprint") == row["fingerprint"] and not other.get("reviewed")
+        ), None)
+    if row.get("cluster_id") is None:
+        row["cluster_id"] = row["id"]
+
+
+def unsolved_query_clusters_local(
+    tables: dict[str, list[dict]],
+    next_id: Callable[[str], int],
+    p_limit: int = 50,
+    p_min_count: int = 1,
+) -> list[dict]:
+    """In-memory stand-in for the `unsolved_query_clusters` SQL function."""
+    members: dict[int, list[dict]] = {}
+    for row in sorted(tables["unsolved_queries"], key=lambda row: row["id"]):
+        if not row.get("reviewed"):
+            members.setdefault(row.get("cluster_id") or row["id"], []).append(row)
+
+    clusters = [
+        {
+            "id": cluster_id,
+            "representative": rows[0]["query_text"].strip(),
+            "count": len(rows),
+            "students": len({row["student_id"] for row in rows}),
+            "query_ids": [row["id"] for row in rows][:50],
+            "first_seen": min((row["created_at"] for row in rows if row.get("created_at")), default=None),
+            "last_seen": max((row["created_at"] for row in rows if row.get("created_at")), default=None),
+        }
+        for cluster_id, rows in members.items()
+        if len(rows) >= p_min_count
+    ]
+    clusters.sort(key=lambda cluster: (-cluster["count"], cluster["id"]))
+    return clusters[:p_limit]
+
+
+def resolve_unsolved_cluster_local(
+    tables: dict[str, list[dict]],
+    next_id: Callable[[str], int],
+    p_cluster_id: int,
+    p_answer: str,
+    p_question: str | None = None,
+    p_admin_id: int | None = None,
+) -> list[dict]:
+    """In-memory stand-in for the `resolve_unsolved_cluster` SQL function."""
+    members = sorted(
+        (row for row in tables["unsolved_queries"] if row.get("cluster_id") == p_cluster_id and not row.get("reviewed")),
+        key=lambda row: row["id"],
+    )
+    if not members:
+        return []
+
+    first = members[0]
+    results = resolve_unsolved_queries_local(tables, next_id, [{
+        "id": first["id"], "reviewed": True, "solved": True, "answer": p_answer,
+        "question": p_question or first["query_text"].strip(),
+    }], p_admin_id)
+    faq_id = results[0]["faq"]["id"]
+
+    if len(members) > 1:
+        results += resolve_unsolved_queries_local(tables, next_id, [
+            {"id": row["id"], "reviewed": True, "solved": True, "answer": p_answer, "faq_id": faq_id}
+            for row in members[1:]
+        ], p_admin_id)
+    return results
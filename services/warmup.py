@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import time
+from os import getenv
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------
+# Startup warm-up and readiness
+# ------------------------------
+# A fresh worker used to serve its first chat, dashboard and news requests
+# cold: every cache miss and the first Supabase connections were paid by
+# users. The lifespan hook now registers each cache as a warm-up component;
+# they load concurrently in the background while `/` already answers
+# (liveness), and `/ready` reports 503 until every component has loaded, so
+# a load balancer only routes traffic to warm workers.
+#
+# A component that fails is retried with backoff (WARMUP_RETRY_SECONDS,
+# doubling up to WARMUP_MAX_RETRY_SECONDS) and the worker stays unready.
+# Each component's time is logged and served by `/ready`.
+
+WARMUP_RETRY_SECONDS = float(getenv("WARMUP_RETRY_SECONDS", "1"))
+WARMUP_MAX_RETRY_SECONDS = float(getenv("WARMUP_MAX_RETRY_SECONDS", "30"))
+
+
+class Warmup:
+    def __init__(self):
+        self._components: dict[str, Callable[[], Awaitable]] = {}
+        self._status: dict[str, dict] = {}
+        self._task: asyncio.Task | None = None
+        self._started: float | None = None
+        self.elapsed: float | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.elapsed is not None
+
+    def add(self, name: str, load: Callable[[], Awaitable]):
+        """Register an async loader to run before the worker reports ready."""
+        self._components[name] = load
+        self._status[name] = {"status": "pending", "seconds": None, "attempts": 0, "error": None}
+
+    def start(self):
+        self._started = time.perf_counter()
+        self.elapsed = None
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self):
+        await asyncio.gather(*(self._warm(name, load) for name, load in self._components.items()))
+        self.elapsed = time.perf_counter() - self._started
+        logger.info("Warm-up finished in %.3fs", self.elapsed)
+
+    async def _warm(self, name: str, load: Callable[[], Awaitable]):
+        status = self._status[name]
+        delay = WARMUP_RETRY_SECONDS
+        while True:
+            status["attempts"] += 1
+            status["status"] = "loading"
+            started = time.perf_counter()
+            try:
+                await load()
+            except Exception as e:
+                status.update(status="failed", error=str(e))
+                logger.warning("Warm-up of %s failed (attempt %d): %s", name, status["attempts"], e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, WARMUP_MAX_RETRY_SECONDS)
+                continue
+            status.update(status="ready", seconds=round(time.perf_counter() - started, 3), error=None)
+            logger.info("Warmed %s in %.3fs", name, status["seconds"])
+            return
+
+    def status(self) -> dict:
+        return {
+            "status": "ready" if self.ready else "warming",
+            "elapsed_seconds": round(self.elapsed, 3) if self.ready else None,
+            "components": self._status,
+        }
+
+
+warmup = Warmup()
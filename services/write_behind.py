@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import time
+from os import getenv
+from typing import Callable
+from postgrest import APIError
+from database import execute, supabase
+
+logger = logging.getLogger(__name__)
+
+# ------------------------------
+# Write-behind writer for chat logs
+# ------------------------------
+# Chat handlers used to insert into `unsolved_queries` and `chat_logs` before
+# answering. Rows are now queued and the student gets the reply straight away;
+# a background task flushes the queue as one bulk insert per table whenever
+# `batch_size` rows are waiting or `flush_interval` seconds have passed.
+# The queue is bounded: once `max_pending` entries (one per `put()` /
+# `put_many()` call) are waiting, callers block until a flush makes room, so a
+# Supabase outage cannot exhaust memory.
+#
+# The rows of one `put_many()` are always flushed together, so a row can
+# point at another with `StoredId(row)` (e.g. an unsolved query at its chat
+# log): tables holding such references are inserted last, with each
+# reference replaced by the id the database gave the row it points at (None
+# if that row was dropped).
+#
+# Failed inserts are retried with backoff. When the database rejects the
+# rows themselves (a data or integrity error, e.g. a chat log for a
+# `student_id` that does not exist), the batch is split in halves and each
+# half inserted on its own, down to single rows, so only the rows that fail
+# are dropped.
+
+# Queued by stop() to tell the flusher to finish
+_STOP = object()
+
+# SQLSTATE classes of errors caused by the rows, not the connection:
+# 22 data exception, 23 integrity constraint violation
+ROW_ERROR_CLASSES = ("22", "23")
+
+
+def is_row_error(error: Exception) -> bool:
+    """True if retrying the same rows can only fail again."""
+    return isinstance(error, APIError) and str(error.code or "")[:2] in ROW_ERROR_CLASSES
+
+
+class StoredId:
+    """Placeholder for the id of `row`, queued in the same `put_many()`."""
+
+    __slots__ = ("row",)
+
+    def __init__(self, row: dict):
+        self.row = row
+
+
+def _has_refs(row: dict) -> bool:
+    return any(isinstance(value, StoredId) for value in row.values())
+
+
+class WriteBehindWriter:
+    def __init__(
+        self,
+        batch_size: int = int(getenv("LOG_WRITER_BATCH_SIZE", "200")),
+        flush_interval: float = float(getenv("LOG_WRITER_FLUSH_INTERVAL", "1.0")),
+        max_pending: int = int(getenv("LOG_WRITER_MAX_PENDING", "10000")),
+        max_retries: int = 3,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._listeners: dict[str, list[Callable[[list[dict]], None]]] = {}
+        self._counters = {
+            "enqueued_rows": 0,
+            "flushed_rows": 0,
+            "dropped_rows": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher after it has written out everything still queued."""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        # Rows queued behind the stop marker by requests still in flight
+        while not self._queue.empty():
+            await self._flush([item for item in self._drain(self.batch_size) if item is not _STOP])
+
+    async def put(self, table: str, row: dict):
+        """Queue a row for `table`; waits only when the queue is full."""
+        await self.put_many([(table, row)])
+
+    async def put_many(self, items: list[tuple[str, dict]]):
+        """Queue several (table, row) pairs at once, e.g. one chat session's logs."""
+        if not items:
+            return
+        self._counters["enqueued_rows"] += len(items)
+        if not self.running:
+            # No background flusher (e.g. scripts): fall back to a direct insert
+            await self._flush([items])
+            return
+        await self._queue.put(items)
+
+    def on_flushed(self, table: str, listener: Callable[[list[dict]], None]):
+        """Calls `listener` with the stored rows (ids included) after each insert into `table`."""
+        self._listeners.setdefault(table, []).append(listener)
+
+    def stats(self) -> dict:
+        flushes = self._counters["flushes"]
+        return {
+            **self._counters,
+            "total_flush_ms": round(self._counters["total_flush_ms"], 3),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_pending": self.max_pending,
+            "avg_flush_ms": round(self._counters["total_flush_ms"] / flushes, 3) if flushes else 0.0,
+        }
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            # Block until there is something to write, then keep collecting
+            # until the batch is full or the flush window closes
+            batch = []
+            rows = 0
+            deadline = None
+            while rows < self.batch_size:
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    timeout = None if deadline is None else deadline - time.monotonic()
+                    if timeout is not None and timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                rows += len(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch:
+                await self._flush(batch)
+
+    def _drain(self, limit: int) -> list:
+        items = []
+        while len(items) < limit and not self._queue.empty():
+            items.append(self._queue.get_nowait())
+        return items
+
+    async def _flush(self, batch: list[list[tuple[str, dict]]]):
+        rows_by_table: dict[str, list[dict]] = {}
+        for items in batch:
+            for table, row in items:
+                rows_by_table.setdefault(table, []).append(row)
+
+        # Tables whose rows reference others go last, once those have ids
+        stored: dict[int, dict] = {}
+        for table in sorted(rows_by_table, key=lambda table: any(map(_has_refs, rows_by_table[table]))):
+            rows = [self._resolve(row, stored) for row in rows_by_table[table]]
+            stored.update(await self._insert(table, rows))
+
+    @staticmethod
+    def _resolve(row: dict, stored: dict[int, dict]) -> dict:
+        if not _has_refs(row):
+            return row
+        return {
+            key: stored.get(id(value.row), {}).get("id") if isinstance(value, StoredId) else value
+            for key, value in row.items()
+        }
+
+    async def _insert(self, table: str, rows: list[dict]) -> dict[int, dict]:
+        """Inserts `rows`; returns the stored row of each one written, keyed by id() of the queued row."""
+        for attempt in range(1, self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                response = await execute(supabase.table(table).insert(rows))
+            except Exception as e:
+                self._counters["failed_flushes"] += 1
+                if is_row_error(e):
+                    return await self._split(table, rows, e)
+                if attempt == self.max_retries:
+                    self._counters["dropped_rows"] += len(rows)
+                    logger.error("Dropping %d %s rows after %d attempts: %s", len(rows), table, attempt, e)
+                    return {}
+                await asyncio.sleep(0.5 * attempt)
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._counters["flushes"] += 1
+            self._counters["flushed_rows"] += len(rows)
+            self._counters["last_flush_ms"] = round(elapsed_ms, 3)
+            self._counters["max_flush_ms"] = round(max(self._counters["max_flush_ms"], elapsed_ms), 3)
+            self._counters["total_flush_ms"] += elapsed_ms
+            for listener in self._listeners.get(table, ()):
+                try:
+                    listener(response.data or [])
+                except Exception:
+                    logger.exception("Flush listener for %s failed", table)
+            return {id(row): saved for row, saved in zip(rows, response.data or [])}
+
+    async def _split(self, table: str, rows: list[dict], error: Exception) -> dict[int, dict]:
+        """Bisects a batch the database rejected, to drop only the offending rows."""
+        if len(rows) == 1:
+            self._counters["dropped_rows"] += 1
+            logger.error("Dropping a %s row rejected by the database: %s", table, error)
+            return {}
+        middle = len(rows) // 2
+        stored = {}
+        for half in (rows[:middle], rows[middle:]):
+            stored.update(await self._insert(table, half))
+        return stored
+
+
+# Shared writer for `chat_logs` and `unsolved_queries`
+chat_log_writer = WriteBehindWriter()
@@ -1,8 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from services.auth import verify_admin_or_super
 
 # Create a single APIRouter for the entire "admin" module
+# Every admin endpoint requires an admin or super_admin token
 router = APIRouter(
     prefix = "/admin", 
+    dependencies = [Depends(verify_admin_or_super)],
     tags = [
         "Dashboard",
         "FAQs",
@@ -1,8 +1,75 @@
+import asyncio
+from datetime import datetime, timezone
+from os import getenv
 from fastapi import HTTPException
 from models.admin.dashboard import DashboardResponse 
-from database import supabase
+from database import execute, supabase
+from services.cache import CachedValue
+from services.compression import compression_stats
+from services.credentials import passwords
+from services.events import broker
+from services.faq_index import faq_index
+from services.loader import loader_stats
+from services.news_cache import news_snapshot
+from services.write_behind import chat_log_writer
 from . import router
 
+
+def count_rows(table: str, **filters):
+    """Build an exact-count query for `table`, optionally filtered by equality."""
+    # Only the Content-Range total is read; limit(1) keeps the ids out of the response
+    query = supabase.table(table).select("id", count="exact").limit(1)
+    for column, value in filters.items():
+        query = query.eq(column, value)
+    return execute(query)
+
+
+async def compute_dashboard_stats() -> dict:
+    """Runs the five dashboard counts concurrently and combines them."""
+    (
+        students_data,
+        faqs_data,
+        solved_faqs_data,
+        unsolved_faqs_data,
+        unsolved_queries_data,
+    ) = await asyncio.gather(
+        count_rows("students"),
+        count_rows("faqs"),
+        count_rows("faqs", status="solved"),
+        count_rows("faqs", status="unsolved"),
+        count_rows("unsolved_queries"),
+    )
+
+    total_users = students_data.count or 0
+    total_faqs = faqs_data.count or 0
+    solved_faqs = solved_faqs_data.count or 0
+
+    # Combine unsolved FAQs + queries
+    unsolved_faqs = (unsolved_faqs_data.count or 0) + (unsolved_queries_data.count or 0)
+
+    # Calculate success rate
+    total_queries = solved_faqs + unsolved_faqs
+    success_rate = (solved_faqs / total_queries * 100) if total_queries > 0 else 0
+
+    return {
+        "total_users": total_users,
+        "total_faqs": total_faqs,
+        "solved_faqs": solved_faqs,
+        "unsolved_faqs": unsolved_faqs,
+        "success_rate": round(success_rate, 2),
+        "computed_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+# Exact counts are full scans, so results are cached: fresh for
+# DASHBOARD_CACHE_TTL seconds, then served stale while a background refresh
+# runs. Admin write endpoints call `dashboard_stats.invalidate()`.
+dashboard_stats = CachedValue(
+    compute_dashboard_stats,
+    ttl=float(getenv("DASHBOARD_CACHE_TTL", "30")),
+    stale_ttl=float(getenv("DASHBOARD_CACHE_STALE_TTL", "300")),
+)
+
 # ------------------------------
 # ADMIN SIDE - DASHBOARD ENDPOINT
 # ------------------------------
@@ -10,44 +77,35 @@ from . import router
 async def get_admin_dashboard():
     """
     GET /admin/dashboard
-    Returns dashboard statistics from Supabase.
+    Returns dashboard statistics from Supabase (cached, see `dashboard_stats`).
     """
     try:
-        # Fetch total users
-        students_data = supabase.table("students").select("id", count="exact").execute()
-        total_users = students_data.count or 0
-
-        # Fetch total FAQs
-        faqs_data = supabase.table("faqs").select("id", count="exact").execute()
-        total_faqs = faqs_data.count or 0
-
-        # Fetch solved FAQs
-        solved_faqs_data = supabase.table("faqs").select("id", count="exact").eq("status", "solved").execute()
-        solved_faqs = solved_faqs_data.count or 0
-
-        # Fetch unsolved FAQs
-        unsolved_faqs_data = supabase.table("faqs").select("id", count="exact").eq("status", "unsolved").execute()
-        unsolved_faqs_count = unsolved_faqs_data.count or 0
-
-        # Fetch unsolved queries
-        unsolved_queries_data = supabase.table("unsolved_queries").select("id", count="exact").execute()
-        unsolved_queries = unsolved_queries_data.count or 0
-
-        # Combine unsolved FAQs + queries
-        unsolved_faqs = unsolved_faqs_count + unsolved_queries
-
-        # Calculate success rate
-        total_queries = solved_faqs + unsolved_faqs
-        success_rate = (solved_faqs / total_queries * 100) if total_queries > 0 else 0
-
-        # Return final result
-        return DashboardResponse(
-            total_users=total_users,
-            total_faqs=total_faqs,
-            solved_faqs=solved_faqs,
-            unsolved_faqs=unsolved_faqs,
-            success_rate=round(success_rate, 2)
-        )
+        return await dashboard_stats.get()
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ------------------------------
+# ADMIN SIDE - INTERNALS
+# ------------------------------
+@router.get("/dashboard/internals")
+async def get_internal_stats():
+    """
+    GET /admin/dashboard/internals
+    Returns this worker's internal counters in one document: chat log
+    queue, password hashing pool, response caches and FAQ index, event
+    streams, response compression and batched lookups.
+    """
+    return {
+        "log_writer": chat_log_writer.stats(),
+        "kdf": passwords.stats(),
+        "caches": {
+            "dashboard": dashboard_stats.stats(),
+            "news": news_snapshot.stats(),
+            "faq_index": faq_index.stats(),
+        },
+        "events": broker.stats(),
+        "compression": compression_stats.stats(),
+        "loaders": loader_stats(),
+    }
@@ -1,85 +1,139 @@
-from fastapi import HTTPException, UploadFile, File, Form, Path
-from models.admin.faqs import FAQResponse, FAQUpdate
-from database import supabase
+from fastapi import Depends, HTTPException, UploadFile, File, Form, Path, Query, Request, Response
+from fastapi.responses import JSONResponse
+from models.admin.faqs import FAQBatchPatch, FAQBatchUpdate, FAQImportJob, FAQResponse, FAQUpdate
+from models.batch import BatchIds, BatchResult
+from models.pagination import Page
+from database import execute, supabase
+from services.conditional import conditional, etag_for
+from services.batch import delete_many, patch_many, update_many
+from services.faq_index import faq_index
+from services.pagination import PageParams, build_page, page_params, paginate
+from services import pdf_import
+from dataclasses import asdict
 from datetime import datetime, timezone
-from os import path
+from anyio import to_thread
+import logging
+import shutil
 import tempfile
+from .dashboard import dashboard_stats
 from . import router
 
+logger = logging.getLogger(__name__)
+
+async def index_imported_faqs(rows: list[dict]):
+    """Called by the PDF import job once its FAQs are inserted."""
+    await faq_index.upsert_many(rows)
+    dashboard_stats.invalidate()
+
+
 # ------------------------------
 # 1️⃣ Add FAQ (Manual or via PDF Upload)
 # ------------------------------
-@router.post("/faqs", response_model=FAQResponse)
+@router.post("/faqs", response_model=FAQResponse, responses={202: {"model": FAQImportJob}})
 async def add_faq(
     question: str = Form(None),
     answer: str = Form(None),
     source_type: str = Form("manual"),
     created_by: int = Form(...),
+    language: str | None = Form(None),
     file: UploadFile | None = File(None)
 ):
     """
     POST /admin/faqs
     Add FAQ manually or via PDF.
+    A PDF is imported in the background: the response is 202 with a job
+    whose progress is available at GET /admin/faqs/imports/{job_id}.
     """
 
     try:
         if source_type == "pdf" and file:
-            # Save PDF temporarily
-            temp_dir = tempfile.gettempdir()
-            file_path = path.join(temp_dir, file.filename)
-            with open(file_path, "wb") as f:
-                f.write(await file.read())
-
-            # In a real app: extract QnA from PDF and save to DB.
-            # For now, just mock this behavior:
-            question_text = "Extracted question from PDF"
-            answer_text = "Extracted answer from PDF"
-            source_file = file.filename
-
-        else:
-            question_text = question
-            answer_text = answer
-            source_file = None
+            # Copy the spooled upload to its own temp file off the event loop
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+                await to_thread.run_sync(shutil.copyfileobj, file.file, f)
+
+            job = await pdf_import.start_import(f.name, file.filename, created_by, index_imported_faqs)
+            return JSONResponse(status_code=202, content=job.to_dict())
 
         data = {
-            "question": question_text,
-            "answer": answer_text,
+            "question": question,
+            "answer": answer,
             "source_type": source_type,
-            "source_file": source_file,
+            "source_file": None,
             "created_by": created_by,
             "status": "pending",
+            "language": language,
             "created_at": datetime.now(timezone.utc).isoformat(),
             "updated_at": datetime.now(timezone.utc).isoformat()
         }
 
-        response = supabase.table("faqs").insert(data).execute()
-        print(response)
+        response = await execute(supabase.table("faqs").insert(data))
         if not response.data:
             raise HTTPException(status_code=400, detail="Failed to insert FAQ")
 
+        await faq_index.upsert(response.data[0])
+        dashboard_stats.invalidate()
         return response.data[0]
 
     except Exception as e:
-        print(str(e))
+        logger.exception("Failed to add FAQ")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # ------------------------------
 # 2️⃣ Get All FAQs
 # ------------------------------
-@router.get("/faqs", response_model=list[FAQResponse])
-async def get_all_faqs():
+@router.get("/faqs", response_model=Page[FAQResponse] | list[FAQResponse])
+async def get_all_faqs(
+    request: Request,
+    http_response: Response,
+    status: str | None = Query(None),
+    source_type: str | None = Query(None),
+    page: PageParams = Depends(page_params),
+):
     """
     GET /admin/faqs
-    List all FAQs.
+    List FAQs one page at a time (newest first), optionally filtered by
+    status and source_type. `?legacy=true` returns the full list.
+    Answers `If-None-Match` with 304, without a query, while no FAQ has
+    changed.
     """
     try:
-        response = supabase.table("faqs").select("*").order("created_at", desc=True).execute()
-        return response.data
+        # Every FAQ write bumps the index, so its version tags the page
+        etag = etag_for([faq_index.revision, status, source_type, asdict(page)])
+        not_modified = conditional(request, http_response, etag)
+        if not_modified:
+            return not_modified
+
+        query = supabase.table("faqs").select("*")
+        if status:
+            query = query.eq("status", status)
+        if source_type:
+            query = query.eq("source_type", source_type)
+
+        response = await execute(paginate(query, page))
+        return build_page(response.data, page)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ------------------------------
+# 📄 PDF Import Job Status
+# ------------------------------
+@router.get("/faqs/imports/{job_id}", response_model=FAQImportJob)
+async def get_faq_import_job(job_id: str = Path(...)):
+    """
+    GET /admin/faqs/imports/{job_id}
+    Progress of a background PDF import (pages extracted, FAQs inserted).
+    """
+    try:
+        job = await pdf_import.get_job(job_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+
 # ------------------------------
 # 3️⃣ Update FAQ
 # ------------------------------
@@ -87,16 +141,18 @@ async def get_all_faqs():
 async def update_faq(id: int = Path(...), faq: FAQUpdate = None):
     """
     PUT /admin/faqs/{id}
-    Update FAQ question, answer, or status.
+    Update FAQ question, answer, status, or language.
     """
     try:
         update_data = {k: v for k, v in faq.model_dump().items() if v is not None}
         update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
 
-        response = supabase.table("faqs").update(update_data).eq("id", id).execute()
+        response = await execute(supabase.table("faqs").update(update_data).eq("id", id))
         if not response.data:
             raise HTTPException(status_code=404, detail="FAQ not found")
 
+        await faq_index.upsert(response.data[0])
+        dashboard_stats.invalidate()
         return response.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -112,9 +168,69 @@ async def delete_faq(id: int = Path(...)):
     Delete a specific FAQ.
     """
     try:
-        response = supabase.table("faqs").delete().eq("id", id).execute()
+        response = await execute(supabase.table("faqs").delete().eq("id", id))
         if not response.data:
             raise HTTPException(status_code=404, detail="FAQ not found")
+
+        await faq_index.remove(id)
+        dashboard_stats.invalidate()
         return {"message": "FAQ deleted successfully", "deleted_id": id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ------------------------------
+# 5️⃣ Batch FAQ Mutations
+# ------------------------------
+@router.post("/faqs/batch/patch", response_model=BatchResult)
+async def patch_faqs(batch: FAQBatchPatch):
+    """
+    POST /admin/faqs/batch/patch
+    Apply the same change (e.g. status=solved) to every listed FAQ.
+    """
+    patch = batch.patch.model_dump(exclude_none=True)
+    if not patch:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+    try:
+        result, rows = await patch_many("faqs", batch.ids, patch)
+        if rows:
+            await faq_index.upsert_many(rows)
+            dashboard_stats.invalidate()
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/faqs/batch/update", response_model=BatchResult)
+async def update_faqs(batch: FAQBatchUpdate):
+    """
+    POST /admin/faqs/batch/update
+    Apply a separate question / answer / status change to each listed FAQ.
+    """
+    patches = {item.id: item.model_dump(exclude={"id"}, exclude_none=True) for item in batch.items}
+    if not any(patches.values()):
+        raise HTTPException(status_code=400, detail="Nothing to update")
+    try:
+        result, rows = await update_many("faqs", patches)
+        if rows:
+            await faq_index.upsert_many(rows)
+            dashboard_stats.invalidate()
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/faqs/batch/delete", response_model=BatchResult)
+async def delete_faqs(batch: BatchIds):
+    """
+    POST /admin/faqs/batch/delete
+    Delete every listed FAQ.
+    """
+    try:
+        result, rows = await delete_many("faqs", batch.ids)
+        if rows:
+            await faq_index.remove_many([row["id"] for row in rows])
+            dashboard_stats.invalidate()
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
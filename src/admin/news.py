@@ -1,9 +1,18 @@
-from fastapi import HTTPException, Path
-from models.admin.news import NewsBase, NewsResponse, NewsUpdate
-from database import supabase
+import logging
+from fastapi import Depends, HTTPException, Path
+from models.admin.news import NewsBase, NewsBatchPatch, NewsBatchUpdate, NewsResponse, NewsUpdate
+from models.batch import BatchIds, BatchResult
+from models.pagination import Page
+from database import execute, supabase
+from services.batch import delete_many, patch_many, update_many
+from services.events import broker
+from services.news_cache import news_snapshot
+from services.pagination import PageParams, build_page, page_params, paginate_rows
 from datetime import datetime, timezone
 from . import router
 
+logger = logging.getLogger(__name__)
+
 # ------------------------------
 # ADMIN SIDE - LATEST NEWS APIs
 # ------------------------------
@@ -24,9 +33,11 @@ async def add_news(news: NewsBase):
             "updated_at": datetime.now(timezone.utc).isoformat(),
         }
 
-        response = supabase.table("news").insert(data).execute()
+        response = await execute(supabase.table("news").insert(data))
         if not response.data:
             raise HTTPException(status_code=400, detail="Failed to insert news.")
+        news_snapshot.invalidate()
+        broker.publish("news", "news_created", response.data[0])
         return response.data[0]
 
     except Exception as e:
@@ -34,22 +45,18 @@ async def add_news(news: NewsBase):
 
 
 # ✅ 2️⃣ List All News
-@router.get("/news", response_model=list[NewsResponse])
-async def list_all_news():
+@router.get("/news", response_model=Page[NewsResponse] | list[NewsResponse])
+async def list_all_news(page: PageParams = Depends(page_params)):
     """
     GET /admin/news
-    Returns all news entries.
+    Returns news entries one page at a time (newest first), served from the
+    cached news snapshot. `?legacy=true` returns the full list.
     """
     try:
-        response = (
-            supabase.table("news")
-            .select("*")
-            .order("created_at", desc=True)
-            .execute()
-        )
-        return response.data
+        rows = await news_snapshot.get()
+        return build_page(paginate_rows(rows, page), page)
     except Exception as e:
-        print(str(e))   
+        logger.exception("Failed to list news")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -66,9 +73,11 @@ async def update_news(
         update_data = {k: v for k, v in news.model_dump().items() if v is not None}
         update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
 
-        response = supabase.table("news").update(update_data).eq("id", id).execute()
+        response = await execute(supabase.table("news").update(update_data).eq("id", id))
         if not response.data:
             raise HTTPException(status_code=404, detail="News not found.")
+        news_snapshot.invalidate()
+        broker.publish("news", "news_updated", response.data[0])
         return response.data[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -82,11 +91,72 @@ async def delete_news(id: int = Path(..., description="News ID to delete")):
     Deletes a specific news entry.
     """
     try:
-        response = supabase.table("news").delete().eq("id", id).execute()
+        response = await execute(supabase.table("news").delete().eq("id", id))
         if not response.data:
             raise HTTPException(
                 status_code=404, detail="News not found or already deleted."
             )
+        news_snapshot.invalidate()
+        broker.publish("news", "news_deleted", {"id": id})
         return {"message": "News deleted successfully", "deleted_id": id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ✅ 5️⃣ Batch News Mutations
+def publish_news_changes(event_type: str, rows: list[dict]):
+    """Refreshes the news snapshot once and notifies clients per item."""
+    news_snapshot.invalidate()
+    for row in rows:
+        broker.publish("news", event_type, row if event_type != "news_deleted" else {"id": row["id"]})
+
+
+@router.post("/news/batch/patch", response_model=BatchResult)
+async def patch_news(batch: NewsBatchPatch):
+    """
+    POST /admin/news/batch/patch
+    Applies the same change to every listed news item.
+    """
+    patch = batch.patch.model_dump(exclude_none=True)
+    if not patch:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+    try:
+        result, rows = await patch_many("news", batch.ids, patch)
+        if rows:
+            publish_news_changes("news_updated", rows)
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/news/batch/update", response_model=BatchResult)
+async def update_news_items(batch: NewsBatchUpdate):
+    """
+    POST /admin/news/batch/update
+    Applies a separate title / content change to each listed news item.
+    """
+    patches = {item.id: item.model_dump(exclude={"id"}, exclude_none=True) for item in batch.items}
+    if not any(patches.values()):
+        raise HTTPException(status_code=400, detail="Nothing to update")
+    try:
+        result, rows = await update_many("news", patches)
+        if rows:
+            publish_news_changes("news_updated", rows)
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/news/batch/delete", response_model=BatchResult)
+async def delete_news_items(batch: BatchIds):
+    """
+    POST /admin/news/batch/delete
+    Deletes every listed news item.
+    """
+    try:
+        result, rows = await delete_many("news", batch.ids)
+        if rows:
+            publish_news_changes("news_deleted", rows)
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,7 +1,11 @@
-from fastapi import HTTPException, Path
-from models.admin.students import StudentBase, StudentResponse, StudentUpdate
-from database import supabase
-from hashlib import sha256
+from fastapi import Depends, HTTPException, Path, Query, Request
+from models.admin.students import StudentBase, StudentImportReport, StudentResponse, StudentUpdate
+from models.pagination import Page
+from database import execute, supabase
+from services.pagination import ID_KEY, PageParams, build_page, id_page_params, paginate
+from services.credentials import passwords
+from services.student_import import STUDENT_IMPORT_BATCH_SIZE, import_students
+from .dashboard import dashboard_stats
 from . import router
 
 @router.post("/students", response_model=StudentResponse)
@@ -11,8 +15,8 @@ async def add_student(student: StudentBase):
     Add a new student.
     """
     try:
-        # Hash password (simple SHA256 for now)
-        hashed_password = sha256(student.password.encode()).hexdigest()
+        # Hash password (scrypt, off the event loop)
+        hashed_password = await passwords.hash_password(student.password)
 
         data = {
             "name": student.name,
@@ -24,29 +28,71 @@ async def add_student(student: StudentBase):
             "status": "active",
         }
 
-        response = supabase.table("students").insert(data).execute()
+        response = await execute(supabase.table("students").insert(data))
         if not response.data:
             raise HTTPException(status_code=400, detail="Failed to add student.")
 
+        dashboard_stats.invalidate()
         return response.data[0]
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# ------------------------------
+# 1️⃣b Bulk Import Students
+# ------------------------------
+@router.post("/students/import", response_model=StudentImportReport)
+async def bulk_import_students(
+    request: Request,
+    format: str | None = Query(None, pattern="^(csv|ndjson)$", description="Defaults to the Content-Type"),
+    batch_size: int = Query(STUDENT_IMPORT_BATCH_SIZE, ge=1, le=5000),
+):
+    """
+    POST /admin/students/import
+    Imports students from a raw CSV (`text/csv`, with a header row) or NDJSON
+    (`application/x-ndjson`) request body, streamed row by row.
+    Returns per-row errors and a throughput summary.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson" if "json" in content_type else None
+    if format is None:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=")
+
+    try:
+        report = await import_students(request.stream(), format, batch_size)
+        if report["inserted"]:
+            dashboard_stats.invalidate()
+        return report
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # ------------------------------
 # 2️⃣ List All Students
 # ------------------------------
-@router.get("/students", response_model=list[StudentResponse])
-async def list_students():
+@router.get("/students", response_model=Page[StudentResponse] | list[StudentResponse])
+async def list_students(
+    department: str | None = Query(None),
+    status: str | None = Query(None),
+    page: PageParams = Depends(id_page_params),
+):
     """
     GET /admin/students
-    Returns all students.
+    Returns students one page at a time (newest first), optionally filtered
+    by department and status. `?legacy=true` returns the full list.
     """
     try:
-        response = supabase.table("students").select(
+        query = supabase.table("students").select(
             "id, name, email, department, enrollment_no, role, status"
-        ).order("id", desc=True).execute()
-        return response.data
+        )
+        if department:
+            query = query.eq("department", department)
+        if status:
+            query = query.eq("status", status)
+
+        response = await execute(paginate(query, page, ID_KEY))
+        return build_page(response.data, page, ID_KEY)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -64,11 +110,13 @@ async def update_student(id: int = Path(...), student: StudentUpdate = None):
         update_data = {k: v for k, v in student.model_dump().items() if v is not None}
 
         if "password" in update_data:
-            update_data["password"] = sha256(update_data["password"].encode()).hexdigest()
+            update_data["password"] = await passwords.hash_password(update_data["password"])
 
-        response = supabase.table("students").update(update_data).eq("id", id).execute()
+        response = await execute(supabase.table("students").update(update_data).eq("id", id))
         if not response.data:
             raise HTTPException(status_code=404, detail="Student not found.")
+
+        dashboard_stats.invalidate()
         return response.data[0]
 
     except Exception as e:
@@ -84,9 +132,11 @@ async def delete_student(id: int = Path(...)):
     Delete a student.
     """
     try:
-        response = supabase.table("students").delete().eq("id", id).execute()
+        response = await execute(supabase.table("students").delete().eq("id", id))
         if not response.data:
             raise HTTPException(status_code=404, detail="Student not found.")
+
+        dashboard_stats.invalidate()
         return {"message": "Student deleted successfully", "deleted_id": id}
 
     except Exception as e:
@@ -1,104 +1,116 @@
-from fastapi import HTTPException, Path
-from models.admin.unsolvedQuery import UnsolvedQuery, UnsolvedQueryUpdate 
-from database import supabase
-from datetime import datetime
+from dataclasses import asdict
+from fastapi import Depends, HTTPException, Path, Query, Request, Response
+from models.admin.unsolvedQuery import (
+    UnsolvedBatchResolve, UnsolvedBatchResult, UnsolvedCluster, UnsolvedClusterResolve,
+    UnsolvedQuery, UnsolvedQueryUpdate,
+)
+from models.pagination import Page
+from database import execute, supabase
+from services.auth import verify_admin_or_super
+from services.clustering import unsolved_clusters
+from services.conditional import conditional, etag_for
+from services.events import broker
+from services.faq_index import faq_index
+from services.pagination import PageParams, build_page, page_params, paginate
+from services.unsolved import list_clusters, resolve_cluster, resolve_queries, unsolved_version
+from .dashboard import dashboard_stats
 from . import router
 
 # ------------------------------
 # 1️⃣ GET - List all unsolved queries
 # ------------------------------
-@router.get("/unsolved", response_model=list[UnsolvedQuery])
-async def list_unsolved_queries():
+@router.get("/unsolved", response_model=Page[UnsolvedQuery] | list[UnsolvedQuery])
+async def list_unsolved_queries(
+    request: Request,
+    http_response: Response,
+    student_id: int | None = Query(None),
+    page: PageParams = Depends(page_params),
+):
     """
     GET /admin/unsolved
-    Returns all unsolved (unreviewed) student queries.
+    Returns unsolved (unreviewed) student queries one page at a time,
+    optionally for a single student. `?legacy=true` returns the full list.
+    Answers `If-None-Match` with 304, without a query, while no query has
+    been added or resolved.
     """
     try:
-        response = (
-            supabase.table("unsolved_queries")
-            .select("*")
-            .eq("reviewed", False)
-            .order("created_at", desc=True)
-            .execute()
-        )
-        return response.data
+        etag = etag_for([unsolved_version.revision, student_id, asdict(page)])
+        not_modified = conditional(request, http_response, etag)
+        if not_modified:
+            return not_modified
+
+        query = supabase.table("unsolved_queries").select("*").eq("reviewed", False)
+        if student_id is not None:
+            query = query.eq("student_id", student_id)
+
+        response = await execute(paginate(query, page))
+        return build_page(response.data, page)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def summarize_resolutions(results: list[dict]) -> dict:
+    counts = {"solved": 0, "reviewed": 0, "not_found": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return {
+        "results": [
+            {
+                "id": result["id"],
+                "status": result["status"],
+                "faq_id": result["faq"]["id"] if result.get("faq") else None,
+                "chat_log_ids": result.get("chat_log_ids"),
+            }
+            for result in results
+        ],
+        **counts,
+    }
+
+
+async def apply_resolutions(results: list[dict]):
+    """Refreshes caches once and notifies students after a resolution batch."""
+    solved = [result for result in results if result["status"] == "solved"]
+    if solved:
+        await faq_index.upsert_many([result["faq"] for result in solved])
+    if any(result["status"] != "not_found" for result in results):
+        dashboard_stats.invalidate()
+        unsolved_version.bump()
+    # Solved rows are deleted and reviewed ones leave the queue
+    unsolved_clusters.discard([result["id"] for result in results])
+
+    # 📣 Push the answers to the students' open event streams
+    for result in solved:
+        broker.publish(f"student:{result['student_id']}", "query_resolved", {
+            "query_id": result["id"],
+            "query_text": result["query_text"],
+            "bot_response": result["answer"],
+            "faq_id": result["faq"]["id"],
+        })
+
+
 # ------------------------------
 # 2️⃣ PUT - Mark query as reviewed or solved (with automatic chat linking)
 # ------------------------------
 @router.put("/unsolved/{id}")
-async def update_unsolved_query(id: int = Path(...), data: UnsolvedQueryUpdate = None):
+async def update_unsolved_query(
+    id: int = Path(...),
+    data: UnsolvedQueryUpdate = None,
+    decoded: dict = Depends(verify_admin_or_super),
+):
     """
     PUT /admin/unsolved/{id}
     Marks a query as reviewed or solved.
     If solved=True → adds to FAQs + updates student's chat history.
     """
     try:
-        # Step 1️⃣ — Fetch the original query
-        query_data = supabase.table("unsolved_queries").select("*").eq("id", id).execute()
-        if not query_data.data:
+        # One transactional RPC call (see services/unsolved.py)
+        results = await resolve_queries([{"id": id, **data.model_dump()}], decoded.get("admin_id"))
+        if not results or results[0]["status"] == "not_found":
             raise HTTPException(status_code=404, detail="Query not found")
-        query_item = query_data.data[0]
-
-        student_id = query_item["student_id"]
-        query_text = query_item["query_text"]
-
-        # Step 2️⃣ — Mark query as reviewed
-        supabase.table("unsolved_queries").update({"reviewed": data.reviewed}).eq("id", id).execute()
-
-        # Step 3️⃣ — If admin solved it, move to FAQs and update chat log
-        if data.solved:
-            answer_text = data.answer or "Answer added by admin"
-
-            # ➕ Add to FAQs
-            faq_data = {
-                "question": query_text,
-                "answer": answer_text,
-                "source_type": "text",
-                "created_by": 1,  # Replace with logged-in admin ID if available
-                "created_at": datetime.utcnow().isoformat(),
-                "updated_at": datetime.utcnow().isoformat(),
-                "status": "solved"
-            }
-            faq_insert = supabase.table("faqs").insert(faq_data).execute()
-
-            # ✅ Update the student's chat history (auto bot reply)
-            chat_record = (
-                supabase.table("chat_logs")
-                .select("id")
-                .eq("student_id", student_id)
-                .eq("query_text", query_text)
-                .order("created_at", desc=True)
-                .limit(1)
-                .execute()
-            )
-
-            if chat_record.data:
-                chat_id = chat_record.data[0]["id"]
-                supabase.table("chat_logs").update(
-                    {
-                        "bot_response": answer_text,
-                        "status": "solved",
-                        "updated_at": datetime.utcnow().isoformat()
-                    }
-                ).eq("id", chat_id).execute()
-            else:
-                # If no chat record exists, create one for student
-                chat_log = {
-                    "student_id": student_id,
-                    "query_text": query_text,
-                    "bot_response": answer_text,
-                    "status": "solved",
-                    "created_at": datetime.utcnow().isoformat(),
-                }
-                supabase.table("chat_logs").insert(chat_log).execute()
-
-            # 🧹 Clean up unsolved_queries
-            supabase.table("unsolved_queries").delete().eq("id", id).execute()
 
+        await apply_resolutions(results)
+
+        if results[0]["status"] == "solved":
             return {
                 "message": "Query solved, added to FAQs, and student chat updated.",
                 "linked_to_student_chat": True
@@ -109,3 +121,71 @@ async def update_unsolved_query(id: int = Path(...), data: UnsolvedQueryUpdate =
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ------------------------------
+# 3️⃣ POST - Resolve a batch of queries in one call
+# ------------------------------
+@router.post("/unsolved/resolve", response_model=UnsolvedBatchResult)
+async def resolve_unsolved_batch(
+    batch: UnsolvedBatchResolve,
+    decoded: dict = Depends(verify_admin_or_super),
+):
+    """
+    POST /admin/unsolved/resolve
+    Reviews / solves up to 1000 queries in one transaction (one round trip),
+    with the same effect per item as PUT /admin/unsolved/{id}.
+    """
+    try:
+        results = await resolve_queries(
+            [item.model_dump() for item in batch.items], decoded.get("admin_id")
+        )
+        await apply_resolutions(results)
+        return summarize_resolutions(results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ------------------------------
+# 4️⃣ GET - Near-duplicate clusters of unsolved queries
+# ------------------------------
+@router.get("/unsolved/clusters", response_model=list[UnsolvedCluster])
+async def list_unsolved_clusters(
+    limit: int = Query(50, ge=1, le=500),
+    min_count: int = Query(1, ge=1),
+):
+    """
+    GET /admin/unsolved/clusters
+    Groups of unsolved queries asking the same thing, largest first.
+    """
+    try:
+        return await list_clusters(limit, min_count)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ------------------------------
+# 5️⃣ POST - Answer every query of a cluster with one FAQ
+# ------------------------------
+@router.post("/unsolved/clusters/{cluster_id}/resolve", response_model=UnsolvedBatchResult)
+async def resolve_unsolved_cluster(
+    cluster_id: int = Path(...),
+    data: UnsolvedClusterResolve = None,
+    decoded: dict = Depends(verify_admin_or_super),
+):
+    """
+    POST /admin/unsolved/clusters/{cluster_id}/resolve
+    Adds one FAQ for the cluster and answers every member query (and its
+    students' chat logs) with it. One transactional RPC, whatever the size.
+    """
+    try:
+        results = await resolve_cluster(cluster_id, data.answer, data.question, decoded.get("admin_id"))
+        if not results:
+            raise HTTPException(status_code=404, detail="Cluster not found")
+
+        await apply_resolutions(results)
+        return summarize_resolutions(results)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -7,12 +7,14 @@ router = APIRouter(
         "Student Authentication",
         "Student Chatbot",
         "Student APIs",
-        "Student News"   
+        "Student News",
+        "Student Events"
     ]
 )
 
 # Import route modules to register the endpoints
 from . import auth
 from . import chat
+from . import events
 from . import main
 from . import news
\ No newline at end of file
@@ -1,63 +1,49 @@
-from fastapi import HTTPException
+from fastapi import Depends, HTTPException
 from models.student.auth import TokenResponse, StudentLogin
-from database import supabase
-from hashlib import sha256
-from os import getenv
-import jwt
-from datetime import datetime, timezone, timedelta
+from database import execute, supabase
+from services.auth import create_jwt_token
+from services.credentials import passwords
+from services.loader import Loaders, request_loaders
+from datetime import timedelta
 from . import router 
 
-# ------------------------------
-# JWT SECRET (use environment variable in production)
-# ------------------------------
-JWT_SECRET = getenv("JWT_SECRET", "supersecretkey")
-JWT_ALGORITHM = "HS256"
-
-# ------------------------------
-# Utility Functions
-# ------------------------------
-def create_jwt_token(data: dict):
-    """Generate JWT token with 1-hour expiration"""
-    payload = data.copy()
-    payload["exp"] = datetime.now(timezone.utc) + timedelta(hours=1)
-    token = jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
-    return token
-
 # ------------------------------
 # 1️⃣ Student Login API
 # ------------------------------
 @router.post("/login", response_model=TokenResponse)
-async def student_login(credentials: StudentLogin):
+async def student_login(credentials: StudentLogin, loaders: Loaders = Depends(request_loaders)):
     """
     POST /auth/login
     Logs in a student using email and password.
     Returns JWT token on success.
     """
     try:
-        # Hash incoming password (same as stored)
-        hashed_password = sha256(credentials.password.encode()).hexdigest()
-
-        # Query Supabase for the student
-        response = supabase.table("students").select("*").eq("email", credentials.email).execute()
+        # Query Supabase for the student (logins arriving together share one query)
+        student = await loaders.load("students", credentials.email, key="email")
 
-        if not response.data:
+        if not student:
             raise HTTPException(status_code=404, detail="Invalid email or password")
 
-        student = response.data[0]
-
-        # Compare hashed passwords
-        if student["password"] != hashed_password:
+        # Verify password off the event loop
+        valid, needs_rehash = await passwords.verify_password(credentials.password, student["password"])
+        if not valid:
             raise HTTPException(status_code=401, detail="Invalid email or password")
 
         if student["status"] != "active":
             raise HTTPException(status_code=403, detail="Account inactive. Contact admin.")
 
+        # Upgrade legacy hashes now that we have the plain password
+        if needs_rehash:
+            rehashed = await passwords.hash_password(credentials.password)
+            await execute(supabase.table("students").update({"password": rehashed}).eq("id", student["id"]))
+            passwords.record_rehash()
+
         # Generate JWT token
         token = create_jwt_token({
             "student_id": student["id"],
             "email": student["email"],
             "role": student.get("role", "student")
-        })
+        }, expires_in=timedelta(hours=1))
 
         return {"access_token": token, "token_type": "bearer"}
 
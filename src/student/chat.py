@@ -1,73 +1,105 @@
-from fastapi import APIRouter, HTTPException, Path
-from models.student.chat import ChatRequest, ChatResponse
-from database import supabase
+import asyncio
+import json
+from os import getenv
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, WebSocket, WebSocketDisconnect
+from models.student.chat import ChatFrame, ChatRequest, ChatResponse
+from models.pagination import Page
+from database import execute, supabase
+from services.auth import decode_token, ensure_own_student, verify_student_or_admin
+from services.clustering import unsolved_clusters
+from services.conditional import conditional, etag_for
+from services.faq_index import faq_index
+from services.pagination import PageParams, build_page, page_params, paginate
+from services.write_behind import StoredId, chat_log_writer
 from datetime import datetime, timezone
 from . import router 
 
+FALLBACK_RESPONSE = "I'm not sure about that yet, but our admin will review your question soon."
+
+# Frames a WebSocket client may have in flight before reads pause
+CHAT_WS_MAX_PIPELINE = int(getenv("CHAT_WS_MAX_PIPELINE", "32"))
+
+
+def answer_query(student_id: int, query_text: str, detected_language: str | None) -> tuple[dict, list[tuple[str, dict]]]:
+    """
+    Matches one student query against the FAQ index.
+    Returns the reply and the (table, row) pairs to log for it.
+    """
+    stripped = query_text.strip()
+    logs = []
+
+    # Rank FAQs of the query's language using the in-memory index
+    bot_response = None
+    matched_faq_id = None
+    score = None
+
+    match = faq_index.match(stripped, detected_language)
+    if match:
+        matched_faq_id, bot_response, score = match
+
+    # If match found → mark as solved
+    if bot_response:
+        status = "solved"
+    else:
+        bot_response = FALLBACK_RESPONSE
+        status = "unsolved"
+
+    chat_log = {
+        "student_id": student_id,
+        "query_text": stripped,
+        "detected_language": detected_language,
+        "bot_response": bot_response,
+        "faq_id": matched_faq_id,
+        "status": status,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    logs.append(("chat_logs", chat_log))
+
+    if status == "unsolved":
+        # No match found → queued for admin review in the cluster of the
+        # same / a near-identical open question, linked to its chat log
+        fp, cluster_id = unsolved_clusters.suggest(query_text)
+        logs.append(("unsolved_queries", {
+            "student_id": student_id,
+            "query_text": query_text,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "reviewed": False,
+            "fingerprint": fp,
+            "cluster_id": cluster_id,
+            "chat_log_id": StoredId(chat_log),
+        }))
+
+    reply = {
+        "query_text": stripped,
+        "bot_response": bot_response,
+        "status": status,
+        "created_at": chat_log["created_at"],
+        "faq_id": matched_faq_id,
+        "score": score,
+    }
+    return reply, logs
+
+
 # ------------------------------
 # 1️⃣ POST /student/chat
 # ------------------------------
 @router.post("/chat", response_model=ChatResponse)
-async def send_chat_query(chat: ChatRequest):
+async def send_chat_query(chat: ChatRequest, decoded: dict = Depends(verify_student_or_admin)):
     """
     POST /student/chat
     Handles student query → returns FAQ match or fallback reply.
     Automatically stores logs and unsolved queries.
     """
+    ensure_own_student(decoded, chat.student_id)
     try:
-        query_text = chat.query_text.strip()
-        if not query_text:
+        if not chat.query_text.strip():
             raise HTTPException(status_code=400, detail="Query text cannot be empty.")
 
-        # Step 1️⃣: Search FAQs for a matching question
-        faqs = supabase.table("faqs").select("id, question, answer").execute()
-        bot_response = None
-        matched_faq_id = None
-
-        for faq in faqs.data:
-            if query_text.lower() in faq["question"].lower():
-                bot_response = faq["answer"]
-                matched_faq_id = faq["id"]
-                break
-
-        # Step 2️⃣: If match found → mark as solved
-        if bot_response:
-            status = "solved"
-        else:
-            # No match found → fallback response
-            bot_response = (
-                "I'm not sure about that yet, but our admin will review your question soon."
-            )
-            status = "unsolved"
-
-            # Step 3️⃣: Save to unsolved_queries table
-            unsolved_data = {
-                "student_id": chat.student_id,
-                "query_text": chat.query_text,
-                "created_at": datetime.now(timezone.utc).isoformat(),
-                "reviewed": False,
-            }
-            supabase.table("unsolved_queries").insert(unsolved_data).execute()
-
-        # Step 4️⃣: Log the chat in chat_logs table
-        chat_log = {
-            "student_id": chat.student_id,
-            "query_text": query_text,
-            "detected_language": chat.detected_language,
-            "bot_response": bot_response,
-            "faq_id": matched_faq_id,
-            "status": status,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-        }
-        supabase.table("chat_logs").insert(chat_log).execute()
-
-        # Step 5️⃣: Return the bot response
-        return {
-            "query_text": query_text,
-            "bot_response": bot_response,
-            "status": status,
-            "created_at": chat_log["created_at"],
-        }
+        # Match against the FAQ index, then queue the logs (flushed in bulk)
+        await faq_index.wait_loaded()
+        reply, logs = answer_query(chat.student_id, chat.query_text, chat.detected_language)
+        await chat_log_writer.put_many(logs)
+        return reply
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -76,25 +108,131 @@ async def send_chat_query(chat: ChatRequest):
 # ------------------------------
 # 2️⃣ GET /student/chat/{id}
 # ------------------------------
-@router.get("/chat/{student_id}", response_model=list[ChatResponse])
-async def get_chat_history(student_id: int = Path(...)):
+@router.get("/chat/{student_id}", response_model=Page[ChatResponse] | list[ChatResponse])
+async def get_chat_history(
+    request: Request,
+    http_response: Response,
+    student_id: int = Path(...),
+    status: str | None = Query(None),
+    page: PageParams = Depends(page_params),
+    decoded: dict = Depends(verify_student_or_admin),
+):
     """
     GET /student/chat/{id}
-    Returns all previous chat logs for the given student.
+    Returns the student's chat logs one page at a time (newest first),
+    optionally filtered by status. `?legacy=true` returns the full history.
+    Answers `If-None-Match` with 304 when the page is unchanged.
     """
+    ensure_own_student(decoded, student_id)
     try:
-        response = (
+        query = (
             supabase.table("chat_logs")
-            .select("query_text, bot_response, status, created_at")
+            .select("id, query_text, bot_response, faq_id, status, created_at")
             .eq("student_id", student_id)
-            .order("created_at", desc=True)
-            .execute()
         )
+        if status:
+            query = query.eq("status", status)
+
+        response = await execute(paginate(query, page))
 
-        if not response.data:
+        if not response.data and not page.after:
             raise HTTPException(status_code=404, detail="No chat history found for this student.")
 
-        return response.data
+        body = build_page(response.data, page)
+        return conditional(request, http_response, etag_for(body)) or body
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ------------------------------
+# 3️⃣ WS /student/chat/ws
+# ------------------------------
+def socket_student_id(websocket: WebSocket, token: str | None, student_id: int | None) -> int | None:
+    """Resolves the student a chat socket acts for, or None if it may not connect."""
+    authorization = websocket.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    try:
+        decoded = decode_token(token)
+    except Exception:
+        return None
+
+    role = decoded.get("role")
+    if role == "student":
+        own_id = decoded.get("student_id")
+        return own_id if student_id in (None, own_id) else None
+    if role in ("admin", "super_admin"):
+        return student_id
+    return None
+
+
+def answer_frame(student_id: int, raw: str) -> tuple[dict, list[tuple[str, dict]]]:
+    try:
+        frame = ChatFrame.model_validate_json(raw)
+    except ValueError:
+        return {"id": None, "error": "Invalid frame"}, []
+    if not frame.query_text.strip():
+        return {"id": frame.id, "error": "Query text cannot be empty."}, []
+
+    reply, logs = answer_query(student_id, frame.query_text, frame.detected_language)
+    return {"id": frame.id, **reply}, logs
+
+
+@router.websocket("/chat/ws")
+async def chat_socket(
+    websocket: WebSocket,
+    token: str | None = Query(None),
+    student_id: int | None = Query(None),
+):
+    """
+    WS /student/chat/ws
+    Authenticates once (`?token=` or an Authorization header; admins pass
+    `?student_id=`), then answers `{"id", "query_text", "detected_language"}`
+    frames in order with `{"id", ...ChatResponse}`. Clients may pipeline
+    frames; everything that arrived together is answered, then logged as
+    one batch.
+    """
+    student_id = socket_student_id(websocket, token, student_id)
+    if student_id is None:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    await faq_index.wait_loaded()
+
+    # Bounded, so a client that never reads its replies stops being read too
+    inbox: asyncio.Queue = asyncio.Queue(maxsize=CHAT_WS_MAX_PIPELINE)
+
+    async def read_frames():
+        try:
+            while True:
+                await inbox.put(await websocket.receive_text())
+        except Exception:  # WebSocketDisconnect, a binary frame, a closed socket
+            pass
+        # Tells the sender to stop. Not sent when the reader is cancelled:
+        # the sender is gone and nobody would drain a full inbox
+        await inbox.put(None)
+
+    reader = asyncio.create_task(read_frames())
+    try:
+        connected = True
+        while connected:
+            frames = [await inbox.get()]
+            while not inbox.empty():
+                frames.append(inbox.get_nowait())
+
+            logs = []
+            for raw in frames:
+                if raw is None:
+                    connected = False
+                    break
+                reply, rows = answer_frame(student_id, raw)
+                logs.extend(rows)
+                await websocket.send_text(json.dumps(reply))
+
+            await chat_log_writer.put_many(logs)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
@@ -0,0 +1,41 @@
+from fastapi import Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from services.auth import verify_stream_student_or_admin
+from services.events import EVENTS_HEARTBEAT_SECONDS, HEARTBEAT_FRAME, broker
+from . import router
+
+# ------------------------------
+# 1️⃣ GET /student/events (Server-Sent Events)
+# ------------------------------
+@router.get("/events")
+async def student_events(decoded: dict = Depends(verify_stream_student_or_admin)):
+    """
+    GET /student/events
+    Push channel replacing news / chat polling. Streams `news_created`,
+    `news_updated` and `news_deleted` to everyone, and `query_resolved` to
+    the student whose query an admin answered. A `resync` event means events
+    were dropped and the client should refetch.
+    """
+    topics = ["news"]
+    if decoded.get("student_id") is not None:
+        topics.append(f"student:{decoded['student_id']}")
+
+    subscription = broker.subscribe(*topics)
+    if subscription is None:
+        raise HTTPException(status_code=503, detail="Too many event stream connections")
+
+    async def stream():
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                chunk = await subscription.next(EVENTS_HEARTBEAT_SECONDS)
+                yield chunk if chunk is not None else HEARTBEAT_FRAME
+        finally:
+            # Runs when the client disconnects and the response is cancelled
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
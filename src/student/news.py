@@ -1,31 +1,29 @@
-from fastapi import HTTPException
+import logging
+from fastapi import Depends, HTTPException, Request, Response
 from models.student.news import NewsResponse
-from database import supabase
+from services.news_cache import news_snapshot
+from services.auth import verify_student_or_admin
+from services.conditional import conditional, snapshot_validators
 from . import router 
 
+logger = logging.getLogger(__name__)
+
 # ------------------------------
 # 1️⃣ GET - Fetch all active news
 # ------------------------------
-@router.get("/news", response_model=list[NewsResponse])
-async def get_student_news():
+@router.get("/news", response_model=list[NewsResponse], dependencies=[Depends(verify_student_or_admin)])
+async def get_student_news(request: Request, http_response: Response):
     """
     GET /student/news
     Returns all active news (latest first).
+    Answers `If-None-Match` / `If-Modified-Since` with 304 from the cached
+    snapshot, without a database round trip.
     """
     try:
-        # Fetch news sorted by created_at (newest first)
-        response = (
-            supabase.table("news")
-            .select("id, title, content, created_by, created_at, updated_at")
-            .order("created_at", desc=True)
-            .execute()
-        )
-
-        if not response.data:
-            return []  # No news yet
-
-        return response.data
+        # Cached snapshot, already sorted newest first
+        news = await news_snapshot.get()
+        return conditional(request, http_response, *snapshot_validators(news_snapshot)) or news
 
     except Exception as e:
-        print(str(e))
+        logger.exception("Failed to load news")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,42 +1,12 @@
-from fastapi import HTTPException, Path, Depends, Header
+from fastapi import HTTPException, Path, Depends, Query
 from models.superAdmin.admins import AdminBase, AdminResponse, AdminUpdate
-from database import supabase
-from os import getenv
-from hashlib import sha256
-import jwt
+from models.pagination import Page
+from database import execute, supabase
+from services.pagination import ID_KEY, PageParams, build_page, id_page_params, paginate
+from services.auth import verify_admin_or_super, verify_super_admin
+from services.credentials import passwords
 from . import router
 
-# ------------------------------
-# JWT SETTINGS
-# ------------------------------
-JWT_SECRET = getenv("JWT_SECRET", "supersecretkey")  # ⚠️ Replace in production
-JWT_ALGORITHM = "HS256"
-
-# ------------------------------
-# 🔒 Token Verification
-# ------------------------------
-def verify_token(authorization: str = Header(...)):
-    try:
-        token = authorization.split(" ")[1]
-        decoded = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return decoded
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-
-def verify_super_admin(decoded=Depends(verify_token)):
-    """Allow only super_admin"""
-    if decoded.get("role") != "super_admin":
-        raise HTTPException(status_code=403, detail="Access denied — Super Admins only")
-    return decoded
-
-
-def verify_admin_or_super(decoded=Depends(verify_token)):
-    """Allow admin or super_admin"""
-    if decoded.get("role") not in ["admin", "super_admin"]:
-        raise HTTPException(status_code=403, detail="Access denied — Admin or Super Admin only")
-    return decoded
-
 # ------------------------------
 # 1️⃣ Add Admin — Super Admin Only
 # ------------------------------
@@ -47,7 +17,7 @@ async def add_admin(admin: AdminBase):
     Only Super Admins can add new admins.
     """
     try:
-        hashed_password = sha256(admin.password.encode()).hexdigest()
+        hashed_password = await passwords.hash_password(admin.password)
         data = {
             "name": admin.name,
             "email": admin.email,
@@ -56,7 +26,7 @@ async def add_admin(admin: AdminBase):
             "status": admin.status,
         }
 
-        response = supabase.table("admins").insert(data).execute()
+        response = await execute(supabase.table("admins").insert(data))
         if not response.data:
             raise HTTPException(status_code=400, detail="Failed to add admin.")
 
@@ -69,15 +39,26 @@ async def add_admin(admin: AdminBase):
 # ------------------------------
 # 2️⃣ Get All Admins — Admins + Super Admins
 # ------------------------------
-@router.get("/admins", response_model=list[AdminResponse], dependencies=[Depends(verify_admin_or_super)])
-async def list_admins():
+@router.get("/admins", response_model=Page[AdminResponse] | list[AdminResponse], dependencies=[Depends(verify_admin_or_super)])
+async def list_admins(
+    role: str | None = Query(None),
+    status: str | None = Query(None),
+    page: PageParams = Depends(id_page_params),
+):
     """
     GET /super-admin/admins
-    Accessible by Admins and Super Admins.
+    Accessible by Admins and Super Admins. Paginated, optionally filtered
+    by role and status; `?legacy=true` returns the full list.
     """
     try:
-        response = supabase.table("admins").select("id, name, email, role, status").order("id", desc=True).execute()
-        return response.data
+        query = supabase.table("admins").select("id, name, email, role, status")
+        if role:
+            query = query.eq("role", role)
+        if status:
+            query = query.eq("status", status)
+
+        response = await execute(paginate(query, page, ID_KEY))
+        return build_page(response.data, page, ID_KEY)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -96,9 +77,9 @@ async def update_admin(id: int = Path(...), admin: AdminUpdate = None):
         update_data = {k: v for k, v in admin.dict().items() if v is not None}
 
         if "password" in update_data:
-            update_data["password"] = sha256(update_data["password"].encode()).hexdigest()
+            update_data["password"] = await passwords.hash_password(update_data["password"])
 
-        response = supabase.table("admins").update(update_data).eq("id", id).execute()
+        response = await execute(supabase.table("admins").update(update_data).eq("id", id))
         if not response.data:
             raise HTTPException(status_code=404, detail="Admin not found.")
 
@@ -118,7 +99,7 @@ async def delete_admin(id: int = Path(...)):
     Only Super Admins can delete admins.
     """
     try:
-        response = supabase.table("admins").delete().eq("id", id).execute()
+        response = await execute(supabase.table("admins").delete().eq("id", id))
         if not response.data:
             raise HTTPException(status_code=404, detail="Admin not found or already deleted.")
         return {"message": "Admin deleted successfully", "deleted_id": id}
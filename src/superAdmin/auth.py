@@ -1,63 +1,50 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from models.superAdmin.auth import TokenResponse, AdminLogin
-from database import supabase
-from datetime import datetime, timedelta
-import hashlib
-import jwt
-from os import getenv
+from database import execute, supabase
+from services.auth import create_jwt_token
+from datetime import timedelta
+from services.credentials import passwords
+from services.loader import Loaders, request_loaders
 from . import router
 
-# ------------------------------
-# JWT SETTINGS
-# ------------------------------
-JWT_SECRET = getenv("JWT_SECRET", "supersecretkey")  # ⚠️ Replace with a secure value in production
-JWT_ALGORITHM = "HS256"
-
-# ------------------------------
-# Utility Function
-# ------------------------------
-def create_jwt_token(data: dict):
-    """Generate JWT token with 2-hour expiration"""
-    payload = data.copy()
-    payload["exp"] = datetime.utcnow() + timedelta(hours=2)
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
-
 # ------------------------------
 # 1️⃣ Super Admin / Admin Login
 # ------------------------------
 @router.post("/login", response_model=TokenResponse)
-async def admin_login(credentials: AdminLogin):
+async def admin_login(credentials: AdminLogin, loaders: Loaders = Depends(request_loaders)):
     """
     POST /super-admin/auth/login
     Logs in an admin or super_admin.
     Returns a JWT token.
     """
     try:
-        # Hash password for comparison
-        hashed_password = hashlib.sha256(credentials.password.encode()).hexdigest()
-
-        # Query Supabase for admin
-        response = supabase.table("admins").select("*").eq("email", credentials.email).execute()
+        # Query Supabase for admin (logins arriving together share one query)
+        admin = await loaders.load("admins", credentials.email, key="email")
 
-        if not response.data:
+        if not admin:
             raise HTTPException(status_code=404, detail="Invalid email or password")
 
-        admin = response.data[0]
-
-        # Validate password
-        if admin["password"] != hashed_password:
+        # Validate password off the event loop
+        valid, needs_rehash = await passwords.verify_password(credentials.password, admin["password"])
+        if not valid:
             raise HTTPException(status_code=401, detail="Invalid email or password")
 
         # Check account status
         if admin["status"] != "active":
             raise HTTPException(status_code=403, detail="Account inactive")
 
+        # Upgrade legacy hashes now that we have the plain password
+        if needs_rehash:
+            rehashed = await passwords.hash_password(credentials.password)
+            await execute(supabase.table("admins").update({"password": rehashed}).eq("id", admin["id"]))
+            passwords.record_rehash()
+
         # Create JWT token
         token = create_jwt_token({
             "admin_id": admin["id"],
             "email": admin["email"],
             "role": admin["role"]
-        })
+        }, expires_in=timedelta(hours=2))
 
         return {"access_token": token, "token_type": "bearer"}
 
@@ -1,38 +1,9 @@
-from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi import APIRouter, HTTPException, Depends
 from models.superAdmin.profile import SuperAdminResponse, SuperAdminUpdate
-from database import supabase
-from os import getenv
-from jwt import decode
+from database import execute, supabase
+from services.auth import verify_super_admin
 from . import router
 
-# ------------------------------
-# JWT SETTINGS
-# ------------------------------
-JWT_SECRET = getenv("JWT_SECRET", "supersecretkey")  # ⚠️ Replace with a secure secret
-JWT_ALGORITHM = "HS256"
-
-# ------------------------------
-# Token Verification
-# ------------------------------
-def verify_token(authorization: str = Header(...)):
-    """
-    Verifies the JWT token from Authorization header.
-    """
-    try:
-        token = authorization.split(" ")[1]
-        decoded = decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return decoded
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-def verify_super_admin(decoded=Depends(verify_token)):
-    """
-    Ensures only the Super Admin can access this route.
-    """
-    if decoded.get("role") != "super_admin":
-        raise HTTPException(status_code=403, detail="Access denied — Super Admin only")
-    return decoded
-
 # ------------------------------
 # 1️⃣ GET Super Admin Profile
 # ------------------------------
@@ -43,7 +14,7 @@ async def get_super_admin_profile():
     Returns the super admin’s profile (role='super_admin').
     """
     try:
-        response = supabase.table("admins").select("*").eq("role", "super_admin").execute()
+        response = await execute(supabase.table("admins").select("*").eq("role", "super_admin"))
         if not response.data:
             raise HTTPException(status_code=404, detail="Super Admin not found.")
         return response.data[0]
@@ -65,14 +36,14 @@ async def update_super_admin_profile(update: SuperAdminUpdate):
             raise HTTPException(status_code=400, detail="No valid fields to update.")
 
         # Fetch the Super Admin
-        response = supabase.table("admins").select("id").eq("role", "super_admin").execute()
+        response = await execute(supabase.table("admins").select("id").eq("role", "super_admin"))
         if not response.data:
             raise HTTPException(status_code=404, detail="Super Admin not found.")
 
         super_admin_id = response.data[0]["id"]
 
         # Update Super Admin info
-        result = supabase.table("admins").update(update_data).eq("id", super_admin_id).execute()
+        result = await execute(supabase.table("admins").update(update_data).eq("id", super_admin_id))
         if not result.data:
             raise HTTPException(status_code=400, detail="Failed to update Super Admin profile.")
 